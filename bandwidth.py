@@ -0,0 +1,54 @@
+import threading
+
+
+class BandwidthEstimator:
+    """根据最近的下载估计吞吐量、延迟和图片的平均字节数（指数加权移动平均）"""
+
+    MIN_SAMPLE_BYTES = 32 * 1024  # 太小的下载测不准吞吐量
+
+    def __init__(self, alpha=0.3, bytes_per_pixel=0.35):
+        self.alpha = alpha  # 新样本的权重
+        self.throughput = None  # 字节/秒
+        self.latency = None  # 秒（发出请求到收到响应头）
+        self.bytes_per_pixel = bytes_per_pixel  # JPEG每像素的平均字节数
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    def _average(self, current, value):
+        if current is None:
+            return value
+        return current + self.alpha * (value - current)
+
+    def record_transfer(self, size, seconds, latency):
+        """记录一次下载：传输字节数、传输耗时、响应延迟"""
+        with self._lock:
+            self.latency = self._average(self.latency, latency)
+            if size >= self.MIN_SAMPLE_BYTES and seconds > 0:
+                self.throughput = self._average(self.throughput, size / seconds)
+                self.samples += 1
+
+    def record_image(self, size, pixels):
+        """记录下载的图片大小，用于估计其他尺寸的字节数"""
+        if pixels <= 0:
+            return
+        with self._lock:
+            self.bytes_per_pixel = self._average(self.bytes_per_pixel, size / pixels)
+
+    def estimate_seconds(self, pixels):
+        """估计下载指定像素数的图片需要的时间，还没有测量数据时返回None"""
+        with self._lock:
+            if self.throughput is None:
+                return None
+            return (self.latency or 0) + pixels * self.bytes_per_pixel / self.throughput
+
+    def status(self):
+        """获取当前估计值（用于诊断）"""
+        with self._lock:
+            return {
+                "throughput_kbps": (
+                    round(self.throughput * 8 / 1000) if self.throughput else None
+                ),
+                "latency_ms": round(self.latency * 1000) if self.latency else None,
+                "bytes_per_pixel": round(self.bytes_per_pixel, 3),
+                "samples": self.samples,
+            }
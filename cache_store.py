@@ -0,0 +1,193 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+def compact_photo(photo):
+    """只保留选图和下载需要的字段，减少缓存体积"""
+    urls = photo.get("urls") or {}
+    return {
+        "id": photo.get("id"),
+        "description": photo.get("description") or photo.get("alt_description"),
+        "width": photo.get("width"),
+        "height": photo.get("height"),
+        "urls": {
+            "raw": urls.get("raw", ""),
+            "regular": urls.get("regular", ""),
+            "small": urls.get("small", ""),
+        },
+    }
+
+
+class CacheStore:
+    """基于SQLite的合集缓存存储
+
+    合集信息和照片列表按合集ID分别存取，不再写入 config.json，
+    单个合集的更新只会改动对应的一行。同时保存API响应缓存和选图进度。
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS collections ("
+                " collection_id TEXT PRIMARY KEY,"
+                " info TEXT NOT NULL,"
+                " cached_time REAL NOT NULL)"
+            )
+            # 旧版本的合集照片缓存，已改为照片索引和按页抽取
+            self._conn.execute("DROP TABLE IF EXISTS collection_photos")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS collection_index ("
+                " collection_id TEXT PRIMARY KEY,"
+                " photos TEXT NOT NULL,"
+                " complete INTEGER NOT NULL,"
+                " indexed_time REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS http_responses ("
+                " cache_key TEXT PRIMARY KEY,"
+                " body TEXT NOT NULL,"
+                " etag TEXT,"
+                " last_modified TEXT,"
+                " fetched_time REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS selection_state ("
+                " source_key TEXT PRIMARY KEY,"
+                " seed INTEGER NOT NULL,"
+                " position INTEGER NOT NULL,"
+                " size INTEGER NOT NULL)"
+            )
+
+    def get_collection_info(self, collection_id):
+        """读取合集信息，返回 (info, cached_time)，不存在时返回None"""
+        row = self._fetchone(
+            "SELECT info, cached_time FROM collections WHERE collection_id = ?",
+            (collection_id,),
+        )
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def save_collection_info(self, collection_id, info, cached_time=None):
+        """保存合集信息"""
+        self._execute(
+            "INSERT OR REPLACE INTO collections VALUES (?, ?, ?)",
+            (collection_id, json.dumps(info, ensure_ascii=False), cached_time or time.time()),
+        )
+
+    def get_collection_index(self, collection_id):
+        """读取合集的完整照片索引，返回 (photos, complete, indexed_time)"""
+        row = self._fetchone(
+            "SELECT photos, complete, indexed_time FROM collection_index"
+            " WHERE collection_id = ?",
+            (collection_id,),
+        )
+        if row is None:
+            return None
+        return json.loads(row[0]), bool(row[1]), row[2]
+
+    def save_collection_index(self, collection_id, photos, complete):
+        """保存合集的照片索引（照片应已精简）"""
+        self._execute(
+            "INSERT OR REPLACE INTO collection_index VALUES (?, ?, ?, ?)",
+            (
+                collection_id,
+                json.dumps(photos, ensure_ascii=False, separators=(",", ":")),
+                int(complete),
+                time.time(),
+            ),
+        )
+
+    def get_http_response(self, cache_key):
+        """读取缓存的API响应，返回 (body, etag, last_modified, fetched_time)"""
+        return self._fetchone(
+            "SELECT body, etag, last_modified, fetched_time FROM http_responses"
+            " WHERE cache_key = ?",
+            (cache_key,),
+        )
+
+    def save_http_response(self, cache_key, body, etag, last_modified):
+        """保存API响应及其校验信息"""
+        self._execute(
+            "INSERT OR REPLACE INTO http_responses VALUES (?, ?, ?, ?, ?)",
+            (cache_key, body, etag, last_modified, time.time()),
+        )
+
+    def touch_http_response(self, cache_key):
+        """响应重新验证通过（304），刷新获取时间"""
+        self._execute(
+            "UPDATE http_responses SET fetched_time = ? WHERE cache_key = ?",
+            (time.time(), cache_key),
+        )
+
+    def get_selection_state(self, source_key):
+        """读取来源的选择进度，返回 (seed, position, size)"""
+        return self._fetchone(
+            "SELECT seed, position, size FROM selection_state WHERE source_key = ?",
+            (source_key,),
+        )
+
+    def save_selection_state(self, source_key, seed, position, size):
+        """保存来源的选择进度"""
+        self._execute(
+            "INSERT OR REPLACE INTO selection_state VALUES (?, ?, ?, ?)",
+            (source_key, seed, position, size),
+        )
+
+    def remove_selection_state(self, source_key):
+        """删除来源的选择进度"""
+        self._execute(
+            "DELETE FROM selection_state WHERE source_key = ?", (source_key,)
+        )
+
+    def remove_collection_index(self, collection_id):
+        """删除合集的照片索引"""
+        self._execute(
+            "DELETE FROM collection_index WHERE collection_id = ?", (collection_id,)
+        )
+
+    def remove_collection(self, collection_id):
+        """删除合集的所有缓存"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM collections WHERE collection_id = ?", (collection_id,)
+            )
+            self._conn.execute(
+                "DELETE FROM collection_index WHERE collection_id = ?",
+                (collection_id,),
+            )
+
+    def purge_expired(self, max_age):
+        """删除超过 max_age 秒的缓存，返回剩余的合集数量"""
+        expire_before = time.time() - max_age
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM collections WHERE cached_time < ?", (expire_before,)
+            )
+            self._conn.execute(
+                "DELETE FROM collection_index WHERE collection_id NOT IN"
+                " (SELECT collection_id FROM collections)"
+            )
+            self._conn.execute(
+                "DELETE FROM http_responses WHERE fetched_time < ?", (expire_before,)
+            )
+            return self._conn.execute("SELECT COUNT(*) FROM collections").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _fetchone(self, sql, params):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _execute(self, sql, params):
+        with self._lock, self._conn:
+            self._conn.execute(sql, params)
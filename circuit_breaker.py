@@ -0,0 +1,91 @@
+import threading
+import time
+
+CLOSED = "closed"  # 正常放行
+OPEN = "open"  # 连续失败，暂停请求
+HALF_OPEN = "half_open"  # 冷却结束，放行一次试探请求
+
+
+class CircuitBreaker:
+    """单个接口的熔断器
+
+    连续失败 failure_threshold 次后熔断，reset_timeout 秒内的请求直接拒绝；
+    冷却结束后放行一次试探请求，成功则恢复，失败则重新计时。
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=60):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._state = CLOSED
+        self._failures = 0  # 连续失败次数
+        self._opened_at = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self._stats = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    def allow(self):
+        """是否允许发出请求"""
+        with self._lock:
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self._stats["rejected"] += 1
+                    return False
+                self._state = HALF_OPEN
+                self._trial_in_flight = False
+
+            if self._state == HALF_OPEN:
+                # 半开状态只放行一次试探请求
+                if self._trial_in_flight:
+                    self._stats["rejected"] += 1
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._stats["successes"] += 1
+            if self._state != CLOSED:
+                print(f"接口已恢复: {self.name}")
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._stats["failures"] += 1
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self._stats["opened"] += 1
+                    print(
+                        f"接口连续失败 {self._failures} 次，暂停请求 "
+                        f"{self.reset_timeout} 秒: {self.name}"
+                    )
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def release(self):
+        """放行的请求没有真正发出（如配额不足），不计入成功或失败"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def retry_after(self):
+        """距离允许试探请求还有多少秒（未熔断时为0）"""
+        with self._lock:
+            if self._state != OPEN:
+                return 0
+            return max(0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def status(self):
+        """获取熔断器状态（用于诊断）"""
+        retry_after = self.retry_after()
+        with self._lock:
+            return dict(
+                self._stats,
+                state=self._state,
+                consecutive_failures=self._failures,
+                retry_after=round(retry_after, 1),
+            )
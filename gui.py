@@ -19,10 +19,12 @@ from PyQt5.QtWidgets import (
     QApplication,
     QLineEdit,
 )
-from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtCore import Qt, QSize, QTimer
 from PyQt5.QtGui import QIcon, QPixmap, QPainter, QBrush, QColor
 from settings import Settings
 from wallpaper_manager import WallpaperManager
+from preview import PreviewLoader
+from thumbnails import ThumbnailLoader
 
 
 class MainWindow(QMainWindow):
@@ -35,6 +37,20 @@ class MainWindow(QMainWindow):
         self.settings = Settings()
         self.wallpaper_manager = WallpaperManager(self.settings)
         self.wallpaper_manager.wallpaper_changed.connect(self.on_wallpaper_changed)
+        self.wallpaper_manager.wallpaper_changed.connect(self.reset_change_button)
+        self.wallpaper_manager.error_occurred.connect(self.on_wallpaper_error)
+
+        # 预览图在后台按显示尺寸解码；窗口大小变化停止一段时间后才刷新
+        self.preview_loader = PreviewLoader()
+        self.preview_resize_timer = QTimer(self)
+        self.preview_resize_timer.setSingleShot(True)
+        self.preview_resize_timer.setInterval(150)
+        self.preview_resize_timer.timeout.connect(self.refresh_preview)
+
+        # 合集封面和搜索结果缩略图（异步加载，内存 + 磁盘缓存）
+        self.thumbnail_loader = ThumbnailLoader(
+            self.wallpaper_manager.http, self.wallpaper_manager.thumbnail_cache
+        )
 
         # 设置应用程序图标
         self.setup_application_icon()
@@ -172,19 +188,32 @@ class MainWindow(QMainWindow):
         # 分辨率信息
         res_layout = QHBoxLayout()
         res_label = QLabel("屏幕分辨率:")
-        try:
-            resolutions = self.wallpaper_manager.get_screen_resolution()
-            base_res = resolutions.get("base", (1920, 1080))
-            self.res_info = QLabel(f"{base_res[0]} x {base_res[1]} (自动检测)")
-        except Exception as e:
-            print(f"获取屏幕分辨率时出错: {e}")
-            self.res_info = QLabel("1920 x 1080 (默认)")
+        self.res_info = QLabel()
+        self.update_resolution_info()
+        self.wallpaper_manager.screen_info.changed.connect(self.update_resolution_info)
 
         res_layout.addWidget(res_label)
         res_layout.addWidget(self.res_info)
         res_layout.addStretch()
         settings_layout.addLayout(res_layout)
 
+        # 多屏幕模式
+        monitor_layout = QHBoxLayout()
+        monitor_label = QLabel("多屏幕:")
+        self.monitor_combo = QComboBox()
+        self.monitor_combo.addItem("所有屏幕使用同一张", "single")
+        self.monitor_combo.addItem("每个屏幕单独一张", "per_screen")
+        current_mode = self.settings.get_setting("multi_monitor_mode", "single")
+        index = self.monitor_combo.findData(current_mode)
+        if index >= 0:
+            self.monitor_combo.setCurrentIndex(index)
+        self.monitor_combo.currentIndexChanged.connect(self.on_monitor_mode_changed)
+
+        monitor_layout.addWidget(monitor_label)
+        monitor_layout.addWidget(self.monitor_combo)
+        monitor_layout.addStretch()
+        settings_layout.addLayout(monitor_layout)
+
         # API设置
         api_layout = QHBoxLayout()
         api_label = QLabel("Unsplash API密钥:")
@@ -257,8 +286,12 @@ class MainWindow(QMainWindow):
         manage_custom_btn = QPushButton("管理自定义合集")
         manage_custom_btn.clicked.connect(self.manage_custom_collections_dialog)
 
+        import_collections_btn = QPushButton("批量导入")
+        import_collections_btn.clicked.connect(self.import_collections_dialog)
+
         custom_collection_layout.addWidget(add_custom_btn)
         custom_collection_layout.addWidget(manage_custom_btn)
+        custom_collection_layout.addWidget(import_collections_btn)
         custom_collection_layout.addStretch()
         collection_layout.addLayout(custom_collection_layout)
 
@@ -272,6 +305,12 @@ class MainWindow(QMainWindow):
 
         # 预览区域
         collection_preview_layout = QHBoxLayout()
+        self.collection_cover_label = QLabel()
+        self.collection_cover_label.setFixedSize(160, 107)
+        self.collection_cover_label.setAlignment(Qt.AlignCenter)
+        self.collection_cover_label.hide()
+        collection_preview_layout.addWidget(self.collection_cover_label)
+
         self.collection_preview_label = QLabel("合集/用户预览")
         self.collection_preview_label.setAlignment(Qt.AlignCenter)
         self.collection_preview_label.setMinimumHeight(100)
@@ -445,7 +484,11 @@ class MainWindow(QMainWindow):
 
             # 停止壁纸管理器
             if hasattr(self, "wallpaper_manager"):
-                self.wallpaper_manager.stop_timer()
+                self.wallpaper_manager.shutdown()
+
+            # 保存尚未写入的设置
+            if hasattr(self, "settings"):
+                self.settings.flush()
 
             # 隐藏托盘图标
             if hasattr(self, "tray_icon"):
@@ -470,15 +513,31 @@ class MainWindow(QMainWindow):
             sys.exit(0)
 
     def manual_change_wallpaper(self):
-        """手动更换壁纸"""
+        """手动更换壁纸（后台执行，完成后通过信号更新界面）"""
+        self.change_now_btn.setEnabled(False)
+        self.change_now_btn.setText("更换中...")
         self.wallpaper_manager.change_wallpaper()
 
+    def on_wallpaper_error(self, message):
+        """壁纸更换失败事件"""
+        print(message)
+        self.reset_change_button()
+
+    def reset_change_button(self):
+        """恢复"立即更换壁纸"按钮"""
+        self.change_now_btn.setText("立即更换壁纸")
+        self.change_now_btn.setEnabled(True)
+
     def on_frequency_changed(self, text):
         """频率改变事件"""
         self.settings.set_setting("frequency", text)
         self.wallpaper_manager.stop_timer()
         self.wallpaper_manager.start_timer()
 
+    def on_monitor_mode_changed(self, index):
+        """多屏幕模式改变事件"""
+        self.settings.set_setting("multi_monitor_mode", self.monitor_combo.itemData(index))
+
     def on_autostart_changed(self, state):
         """自启动设置改变"""
         self.settings.set_setting("auto_start", state == Qt.Checked)
@@ -683,6 +742,7 @@ class MainWindow(QMainWindow):
                 "font-size: 12px; "
                 "color: #6c757d;"
             )
+            self.wallpaper_manager.schedule_prefetch()
             return
 
         # 获取选中的合集ID
@@ -692,6 +752,7 @@ class MainWindow(QMainWindow):
         # 如果是分隔符，跳过
         if collection_id == "separator":
             self.settings.set_setting("selected_collection", "")
+            self.wallpaper_manager.schedule_prefetch()
             return
 
         if collection_id:
@@ -708,6 +769,9 @@ class MainWindow(QMainWindow):
         else:
             self.settings.set_setting("selected_collection", "")
 
+        # 切换合集后清空旧合集的预取队列，并开始预取新合集
+        self.wallpaper_manager.schedule_prefetch()
+
     def search_collections_dialog(self):
         """打开搜索合集对话框"""
         print("search_collections_dialog 被调用")  # 调试信息
@@ -720,6 +784,7 @@ class MainWindow(QMainWindow):
             QPushButton,
             QListWidget,
             QListWidgetItem,
+            QLabel,
         )
 
         dialog = QDialog(self)
@@ -738,10 +803,28 @@ class MainWindow(QMainWindow):
         search_layout.addWidget(search_btn)
         layout.addLayout(search_layout)
 
-        # 搜索结果列表
+        # 搜索结果列表（左侧显示合集的第一张预览图）
         results_list = QListWidget()
+        results_list.setIconSize(QSize(96, 64))
         layout.addWidget(results_list)
 
+        status_label = QLabel("")
+        layout.addWidget(status_label)
+
+        # 每次搜索 generation 加1，之前搜索的结果（包括缩略图）返回时直接丢弃
+        search_state = {
+            "generation": 0,
+            "query": "",
+            "page": 0,
+            "total_pages": 0,
+            "loading": False,
+        }
+
+        # 输入停顿一段时间后自动搜索
+        debounce_timer = QTimer(dialog)
+        debounce_timer.setSingleShot(True)
+        debounce_timer.setInterval(400)
+
         # 按钮
         button_layout = QHBoxLayout()
         select_btn = QPushButton("选择")
@@ -754,41 +837,121 @@ class MainWindow(QMainWindow):
         layout.addLayout(button_layout)
 
         # 定义内部函数
-        def perform_search():
+        def perform_search(show_warning=True):
+            debounce_timer.stop()
             query = search_input.text().strip()
             if not query:
-                QMessageBox.warning(dialog, "提示", "请输入搜索关键词")
+                if show_warning:
+                    QMessageBox.warning(dialog, "提示", "请输入搜索关键词")
+                return
+
+            # 自动搜索已经在显示这个关键词的结果
+            if query == search_state["query"] and search_state["page"] > 0:
                 return
 
-            search_btn.setText("搜索中...")
-            search_btn.setEnabled(False)
+            search_state["generation"] += 1
+            search_state["query"] = query
+            search_state["page"] = 0
+            search_state["total_pages"] = 0
             results_list.clear()
+            load_page(1)
+
+        def load_page(page):
+            generation = search_state["generation"]
+            search_state["loading"] = True
+            status_label.setText("搜索中..." if page == 1 else "正在加载更多...")
+
+            # 在后台搜索，完成后回到GUI线程显示结果
+            self.wallpaper_manager.run_async(
+                self.wallpaper_manager.search_collections_page,
+                search_state["query"],
+                page,
+                on_result=lambda result: show_results(generation, result),
+                on_error=lambda message: show_error(generation, message),
+            )
 
-            try:
-                collections = self.wallpaper_manager.search_collections(query)
+        def load_more():
+            if search_state["loading"]:
+                return
+            if search_state["page"] >= search_state["total_pages"]:
+                return
+            load_page(search_state["page"] + 1)
 
-                for collection in collections:
-                    item_text = (
-                        f"{collection['title']}\n照片数量: {collection['total_photos']}"
-                    )
-                    if collection["description"]:
-                        item_text += f"\n描述: {collection['description'][:100]}..."
+        def on_scrolled(value):
+            # 滚动到接近底部时加载下一页
+            scroll_bar = results_list.verticalScrollBar()
+            if value >= scroll_bar.maximum() - scroll_bar.pageStep() // 2:
+                load_more()
 
-                    item = QListWidgetItem(item_text)
-                    item.setData(Qt.UserRole, collection["id"])
-                    results_list.addItem(item)
+        def on_text_edited(text):
+            if text.strip():
+                debounce_timer.start()
+            else:
+                debounce_timer.stop()
 
-                if not collections:
-                    item = QListWidgetItem("未找到相关合集")
-                    results_list.addItem(item)
+        def show_results(generation, result):
+            # 关键词已经改变，丢弃过期的结果
+            if generation != search_state["generation"]:
+                return
 
-            except Exception as e:
-                item = QListWidgetItem(f"搜索失败: {str(e)}")
+            search_state["loading"] = False
+            search_state["page"] = result["page"]
+            search_state["total_pages"] = result["total_pages"]
+
+            collections = result["results"]
+            for collection in collections:
+                item_text = (
+                    f"{collection['title']}\n照片数量: {collection['total_photos']}"
+                )
+                if collection["description"]:
+                    item_text += f"\n描述: {collection['description'][:100]}..."
+
+                item = QListWidgetItem(item_text)
+                item.setData(Qt.UserRole, collection["id"])
                 results_list.addItem(item)
 
-            finally:
-                search_btn.setText("搜索")
-                search_btn.setEnabled(True)
+                if collection["preview_photos"]:
+                    load_thumbnail(item, collection["preview_photos"][0])
+
+            if not collections and result["page"] == 1:
+                item = QListWidgetItem("未找到相关合集")
+                results_list.addItem(item)
+
+            status_label.setText(
+                f"共 {result['total']} 个合集，已显示 {results_list.count()} 个"
+                if collections or result["page"] > 1
+                else ""
+            )
+
+            QTimer.singleShot(0, fill_viewport)
+
+        def fill_viewport():
+            # 结果不足一屏时没有滚动条，直接加载下一页
+            if results_list.verticalScrollBar().maximum() == 0:
+                load_more()
+
+        def load_thumbnail(item, url):
+            generation = search_state["generation"]
+
+            def set_icon(pixmap):
+                if generation == search_state["generation"]:
+                    item.setIcon(QIcon(pixmap))
+
+            size = results_list.iconSize()
+            self.thumbnail_loader.load(url, size.width(), size.height(), set_icon)
+
+        def show_error(generation, message):
+            if generation != search_state["generation"]:
+                return
+
+            search_state["loading"] = False
+            if search_state["page"] == 0:
+                # 第一页失败时允许用相同关键词重新搜索
+                search_state["query"] = ""
+                results_list.addItem(QListWidgetItem(f"搜索失败: {message}"))
+                status_label.setText("")
+            else:
+                status_label.setText(f"加载更多失败: {message}")
 
         def on_selection_changed():
             current_item = results_list.currentItem()
@@ -817,8 +980,11 @@ class MainWindow(QMainWindow):
                 select_collection()
 
         # 连接事件
-        search_btn.clicked.connect(perform_search)
-        search_input.returnPressed.connect(perform_search)
+        search_btn.clicked.connect(lambda: perform_search())
+        search_input.returnPressed.connect(lambda: perform_search())
+        search_input.textEdited.connect(on_text_edited)
+        debounce_timer.timeout.connect(lambda: perform_search(show_warning=False))
+        results_list.verticalScrollBar().valueChanged.connect(on_scrolled)
         results_list.itemSelectionChanged.connect(on_selection_changed)
         select_btn.clicked.connect(select_collection)
         cancel_btn.clicked.connect(dialog.reject)
@@ -826,6 +992,7 @@ class MainWindow(QMainWindow):
 
         # 显示对话框
         dialog.exec_()
+        search_state["generation"] += 1
 
     def add_custom_collection_dialog(self):
         """添加自定义合集对话框 - 整合版"""
@@ -960,6 +1127,23 @@ class MainWindow(QMainWindow):
             validated_collection.clear()
             update_result_display("请输入合集ID或URL并点击验证", "default")
 
+        def finish_validation():
+            validate_btn.setText("验证合集")
+            validate_btn.setEnabled(True)
+
+        def show_validation_exception(message, user_input):
+            print(f"验证过程中发生异常: {message}")
+
+            error_text = (
+                f"✗ 验证过程中发生错误\n\n"
+                f"错误信息: {message}\n"
+                f"输入内容: {user_input}"
+            )
+
+            update_result_display(error_text, "error")
+            add_btn.setEnabled(False)
+            finish_validation()
+
         def auto_detect_and_validate():
             """自动检测输入类型并验证"""
             user_input = collection_input.text().strip()
@@ -967,223 +1151,249 @@ class MainWindow(QMainWindow):
                 update_result_display("请输入合集ID、URL或用户likes链接", "error")
                 return
 
+            # 检查API密钥
+            if not self.wallpaper_manager.unsplash_access_key:
+                update_result_display(
+                    "✗ 验证失败\n\n"
+                    "错误: 未设置Unsplash API密钥\n\n"
+                    "请在基本设置中输入您的API密钥",
+                    "error",
+                )
+                add_btn.setEnabled(False)
+                return
+
+            # 首先检查是否是用户likes链接
+            username = self.wallpaper_manager.extract_user_from_likes_url(user_input)
+
+            if username:
+                print(f"检测为用户likes链接，用户名: {username}")
+
+                # 在后台验证用户likes（用户信息和第一页likes同时请求）
+                validate_btn.setText("验证中...")
+                validate_btn.setEnabled(False)
+                self.wallpaper_manager.run_async(
+                    self.wallpaper_manager.validate_collection_source,
+                    f"user_likes_{username}",
+                    on_progress=lambda partial: show_validation_progress(
+                        user_input, partial
+                    ),
+                    on_result=lambda info: on_user_likes_validated(
+                        user_input, username, info
+                    ),
+                    on_error=lambda message: show_validation_exception(
+                        message, user_input
+                    ),
+                )
+                return
+
+            # 如果不是用户likes链接，按原有逻辑处理合集
+            collection_id = None
+            input_type = "未知"
+
+            print(f"用户输入: {user_input}")
+
+            # 检查是否是URL
+            if "unsplash.com" in user_input.lower() or user_input.startswith("http"):
+                collection_id = self.extract_collection_id_from_url(user_input)
+                input_type = "URL"
+                print(f"检测为URL，提取的ID: {collection_id}")
+            else:
+                # 检查是否是有效的合集ID
+                if self._is_valid_collection_id(user_input):
+                    collection_id = user_input
+                    input_type = "ID"
+                    print(f"检测为合集ID: {collection_id}")
+                else:
+                    # 尝试作为URL处理
+                    collection_id = self.extract_collection_id_from_url(user_input)
+                    if collection_id:
+                        input_type = "URL片段"
+                        print(f"作为URL片段处理，提取的ID: {collection_id}")
+
+            if not collection_id:
+                update_result_display(
+                    "✗ 无法识别输入格式\n\n"
+                    f"您输入的内容: {user_input}\n\n"
+                    "请确保输入正确的合集ID、URL或用户likes链接格式",
+                    "error",
+                )
+                add_btn.setEnabled(False)
+                return
+
+            print(f"开始验证合集ID: {collection_id}")
+
+            # 在后台验证合集（合集信息和第一页照片同时请求）
             validate_btn.setText("验证中...")
             validate_btn.setEnabled(False)
+            self.wallpaper_manager.run_async(
+                self.wallpaper_manager.validate_collection_source,
+                collection_id,
+                on_progress=lambda partial: show_validation_progress(
+                    user_input, partial
+                ),
+                on_result=lambda info: on_collection_validated(
+                    user_input, input_type, collection_id, info
+                ),
+                on_error=lambda message: show_validation_exception(
+                    message, user_input
+                ),
+            )
 
-            try:
-                # 检查API密钥
-                if not self.wallpaper_manager.unsplash_access_key:
-                    update_result_display(
-                        "✗ 验证失败\n\n"
-                        "错误: 未设置Unsplash API密钥\n\n"
-                        "请在基本设置中输入您的API密钥",
-                        "error",
-                    )
-                    add_btn.setEnabled(False)
-                    return
+        def show_validation_progress(user_input, partial):
+            """先返回的请求结果立即显示，另一个请求完成后再显示最终结果"""
+            if collection_input.text().strip() != user_input:
+                return
 
-                # 首先检查是否是用户likes链接
-                username = self.wallpaper_manager.extract_user_from_likes_url(
-                    user_input
+            name, value = partial
+            if name == "info" and value:
+                update_result_display(
+                    f"正在验证: {value.get('title', '未知标题')}\n\n"
+                    f"照片数量: {value.get('total_photos', 0)}\n"
+                    f"作者: {value.get('user', '未知用户')}\n\n"
+                    "正在确认可以获取照片...",
+                    "default",
                 )
+            elif name == "photos" and value:
+                update_result_display("已获取照片列表，正在获取详细信息...", "default")
 
-                if username:
-                    # 处理用户likes
-                    input_type = "用户Likes链接"
-                    collection_id = f"user_likes_{username}"
+        def on_user_likes_validated(user_input, username, collection_info):
+            """用户likes验证完成"""
+            finish_validation()
 
-                    print(f"检测为用户likes链接，用户名: {username}")
+            # 验证期间输入已改变，丢弃过期结果
+            if collection_input.text().strip() != user_input:
+                return
 
-                    # 验证用户likes
-                    collection_info = (
-                        self.wallpaper_manager.get_user_likes_as_collection_info(
-                            username
-                        )
-                    )
+            input_type = "用户Likes链接"
+            collection_id = f"user_likes_{username}"
 
-                    if (
-                        collection_info
-                        and isinstance(collection_info, dict)
-                        and "id" in collection_info
-                    ):
-                        validated_collection["id"] = collection_id
-                        validated_collection["info"] = collection_info
-                        validated_collection["input_type"] = input_type
-
-                        # 安全地获取各个字段
-                        title = collection_info.get("title", "未知标题")
-                        total_photos = collection_info.get("total_photos", 0)
-                        user = collection_info.get("user", "未知用户")
-                        description = collection_info.get("description") or "无描述"
-
-                        # 自动填充名称
-                        if not collection_name_input.text().strip():
-                            collection_name_input.setText(title)
-
-                        # 安全地截取描述
-                        if description and description != "无描述":
-                            desc_preview = (
-                                description[:150] + "..."
-                                if len(description) > 150
-                                else description
-                            )
-                        else:
-                            desc_preview = "无描述"
-
-                        success_text = (
-                            f"✓ 用户Likes验证成功！\n\n"
-                            f"输入类型: {input_type}\n"
-                            f"用户名: @{username}\n"
-                            f"显示名称: {title}\n"
-                            f"Likes数量: {total_photos}\n"
-                            f"用户: {user}\n"
-                            f"描述: {desc_preview}"
-                        )
-
-                        update_result_display(success_text, "success")
-                        add_btn.setEnabled(True)
-
-                        print("用户likes验证成功")
-                        return
-                    else:
-                        error_msg = (
-                            f"✗ 用户Likes验证失败\n\n"
-                            f"用户名: @{username}\n\n"
-                            f"可能的原因:\n"
-                            f"• 用户不存在\n"
-                            f"• 用户没有likes任何照片\n"
-                            f"• 网络连接问题"
-                        )
-
-                        update_result_display(error_msg, "error")
-                        add_btn.setEnabled(False)
-                        return
-
-                # 如果不是用户likes链接，按原有逻辑处理合集
-                collection_id = None
-                input_type = "未知"
-
-                print(f"用户输入: {user_input}")
-
-                # 检查是否是URL
-                if "unsplash.com" in user_input.lower() or user_input.startswith(
-                    "http"
-                ):
-                    collection_id = self.extract_collection_id_from_url(user_input)
-                    input_type = "URL"
-                    print(f"检测为URL，提取的ID: {collection_id}")
-                else:
-                    # 检查是否是有效的合集ID
-                    if self._is_valid_collection_id(user_input):
-                        collection_id = user_input
-                        input_type = "ID"
-                        print(f"检测为合集ID: {collection_id}")
-                    else:
-                        # 尝试作为URL处理
-                        collection_id = self.extract_collection_id_from_url(user_input)
-                        if collection_id:
-                            input_type = "URL片段"
-                            print(f"作为URL片段处理，提取的ID: {collection_id}")
-
-                if not collection_id:
-                    update_result_display(
-                        "✗ 无法识别输入格式\n\n"
-                        f"您输入的内容: {user_input}\n\n"
-                        "请确保输入正确的合集ID、URL或用户likes链接格式",
-                        "error",
+            if (
+                collection_info
+                and isinstance(collection_info, dict)
+                and "id" in collection_info
+            ):
+                validated_collection["id"] = collection_id
+                validated_collection["info"] = collection_info
+                validated_collection["input_type"] = input_type
+
+                # 安全地获取各个字段
+                title = collection_info.get("title", "未知标题")
+                total_photos = collection_info.get("total_photos", 0)
+                user = collection_info.get("user", "未知用户")
+                description = collection_info.get("description") or "无描述"
+
+                # 自动填充名称
+                if not collection_name_input.text().strip():
+                    collection_name_input.setText(title)
+
+                # 安全地截取描述
+                if description and description != "无描述":
+                    desc_preview = (
+                        description[:150] + "..."
+                        if len(description) > 150
+                        else description
                     )
-                    add_btn.setEnabled(False)
-                    return
+                else:
+                    desc_preview = "无描述"
+
+                success_text = (
+                    f"✓ 用户Likes验证成功！\n\n"
+                    f"输入类型: {input_type}\n"
+                    f"用户名: @{username}\n"
+                    f"显示名称: {title}\n"
+                    f"Likes数量: {total_photos}\n"
+                    f"用户: {user}\n"
+                    f"描述: {desc_preview}"
+                )
 
-                print(f"开始验证合集ID: {collection_id}")
+                update_result_display(success_text, "success")
+                add_btn.setEnabled(True)
 
-                # 验证合集
-                collection_info = self.wallpaper_manager.get_collection_info(
-                    collection_id, cache_if_added=False
+                print("用户likes验证成功")
+            else:
+                error_msg = (
+                    f"✗ 用户Likes验证失败\n\n"
+                    f"用户名: @{username}\n\n"
+                    f"可能的原因:\n"
+                    f"• 用户不存在\n"
+                    f"• 用户没有likes任何照片\n"
+                    f"• 网络连接问题"
                 )
-                print(f"API返回的合集信息: {collection_info}")
-
-                if (
-                    collection_info
-                    and isinstance(collection_info, dict)
-                    and "id" in collection_info
-                ):
-                    validated_collection["id"] = collection_id
-                    validated_collection["info"] = collection_info
-                    validated_collection["input_type"] = input_type
-
-                    # 安全地获取各个字段
-                    title = collection_info.get("title", "未知标题")
-                    total_photos = collection_info.get("total_photos", 0)
-                    user = collection_info.get("user", "未知用户")
-                    description = collection_info.get("description") or "无描述"
-
-                    # 自动填充名称
-                    if not collection_name_input.text().strip():
-                        collection_name_input.setText(title)
-
-                    # 安全地截取描述
-                    if description and description != "无描述":
-                        desc_preview = (
-                            description[:150] + "..."
-                            if len(description) > 150
-                            else description
-                        )
-                    else:
-                        desc_preview = "无描述"
-
-                    success_text = (
-                        f"✓ 合集验证成功！\n\n"
-                        f"输入类型: {input_type}\n"
-                        f"合集ID: {collection_id}\n"
-                        f"标题: {title}\n"
-                        f"照片数量: {total_photos}\n"
-                        f"作者: {user}\n"
-                        f"描述: {desc_preview}"
-                    )
 
-                    update_result_display(success_text, "success")
-                    add_btn.setEnabled(True)
+                update_result_display(error_msg, "error")
+                add_btn.setEnabled(False)
 
-                    print("界面更新成功")
+        def on_collection_validated(user_input, input_type, collection_id, collection_info):
+            """合集验证完成"""
+            finish_validation()
 
-                else:
-                    # 详细的错误信息
-                    error_msg = "✗ 合集验证失败\n\n"
-                    error_msg += f"输入类型: {input_type}\n"
-                    error_msg += f"提取的合集ID: {collection_id}\n\n"
-
-                    if collection_info is None:
-                        error_msg += "API返回了空值"
-                    elif not isinstance(collection_info, dict):
-                        error_msg += f"API返回了意外的数据类型: {type(collection_info)}"
-                    elif "id" not in collection_info:
-                        error_msg += "API返回的数据中缺少必要字段"
-                    else:
-                        error_msg += "未知错误"
+            # 验证期间输入已改变，丢弃过期结果
+            if collection_input.text().strip() != user_input:
+                return
 
-                    update_result_display(error_msg, "error")
-                    add_btn.setEnabled(False)
+            print(f"API返回的合集信息: {collection_info}")
 
-            except Exception as e:
-                import traceback
+            if (
+                collection_info
+                and isinstance(collection_info, dict)
+                and "id" in collection_info
+            ):
+                validated_collection["id"] = collection_id
+                validated_collection["info"] = collection_info
+                validated_collection["input_type"] = input_type
 
-                error_details = traceback.format_exc()
-                print(f"验证过程中发生异常: {error_details}")
+                # 安全地获取各个字段
+                title = collection_info.get("title", "未知标题")
+                total_photos = collection_info.get("total_photos", 0)
+                user = collection_info.get("user", "未知用户")
+                description = collection_info.get("description") or "无描述"
+
+                # 自动填充名称
+                if not collection_name_input.text().strip():
+                    collection_name_input.setText(title)
+
+                # 安全地截取描述
+                if description and description != "无描述":
+                    desc_preview = (
+                        description[:150] + "..."
+                        if len(description) > 150
+                        else description
+                    )
+                else:
+                    desc_preview = "无描述"
 
-                error_text = (
-                    f"✗ 验证过程中发生错误\n\n"
-                    f"错误类型: {type(e).__name__}\n"
-                    f"错误信息: {str(e)}\n"
-                    f"输入内容: {user_input}"
+                success_text = (
+                    f"✓ 合集验证成功！\n\n"
+                    f"输入类型: {input_type}\n"
+                    f"合集ID: {collection_id}\n"
+                    f"标题: {title}\n"
+                    f"照片数量: {total_photos}\n"
+                    f"作者: {user}\n"
+                    f"描述: {desc_preview}"
                 )
 
-                update_result_display(error_text, "error")
-                add_btn.setEnabled(False)
+                update_result_display(success_text, "success")
+                add_btn.setEnabled(True)
 
-            finally:
-                validate_btn.setText("验证合集")
-                validate_btn.setEnabled(True)
+                print("界面更新成功")
+
+            else:
+                # 详细的错误信息
+                error_msg = "✗ 合集验证失败\n\n"
+                error_msg += f"输入类型: {input_type}\n"
+                error_msg += f"提取的合集ID: {collection_id}\n\n"
+
+                if collection_info is None:
+                    error_msg += "合集不存在、没有照片或网络连接问题"
+                elif not isinstance(collection_info, dict):
+                    error_msg += f"API返回了意外的数据类型: {type(collection_info)}"
+                elif "id" not in collection_info:
+                    error_msg += "API返回的数据中缺少必要字段"
+                else:
+                    error_msg += "未知错误"
+
+                update_result_display(error_msg, "error")
+                add_btn.setEnabled(False)
 
         def add_collection():
             """添加合集到自定义列表 (缓存)"""
@@ -1221,11 +1431,14 @@ class MainWindow(QMainWindow):
                 # 添加到设置
                 self.settings.add_custom_collection(name, collection_id)
 
-                # 现在缓存合集信息（因为已经添加了）
-                self.wallpaper_manager.get_collection_info(
-                    collection_id, cache_if_added=True
+                # 直接缓存验证时获取的合集信息，不再重新请求
+                self.wallpaper_manager.cache_validated_collection(
+                    collection_id, validated_collection["info"]
                 )
 
+                # 在后台为合集建立完整的照片索引
+                self.wallpaper_manager.schedule_collection_index(collection_id)
+
                 # 重新加载合集列表
                 self.load_popular_collections()
 
@@ -1266,6 +1479,165 @@ class MainWindow(QMainWindow):
         # 显示对话框
         dialog.exec_()
 
+    def import_collections_dialog(self):
+        """批量导入合集对话框"""
+        from PyQt5.QtWidgets import (
+            QDialog,
+            QVBoxLayout,
+            QHBoxLayout,
+            QPushButton,
+            QLabel,
+            QPlainTextEdit,
+            QListWidget,
+            QListWidgetItem,
+        )
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("批量导入合集")
+        dialog.setMinimumSize(600, 500)
+
+        layout = QVBoxLayout(dialog)
+
+        layout.addWidget(
+            QLabel(
+                "每行一个合集ID、合集URL或用户likes链接（如 @username/likes），"
+                "# 开头的行会被忽略："
+            )
+        )
+
+        text_input = QPlainTextEdit()
+        text_input.setPlaceholderText(
+            "317099\n"
+            "https://unsplash.com/collections/1065976/wallpapers\n"
+            "https://unsplash.com/@username/likes\n"
+            "@username/likes"
+        )
+        layout.addWidget(text_input)
+
+        results_list = QListWidget()
+        layout.addWidget(results_list)
+
+        summary_label = QLabel("")
+        summary_label.setWordWrap(True)
+        layout.addWidget(summary_label)
+
+        button_layout = QHBoxLayout()
+        load_file_btn = QPushButton("从文件加载")
+        import_btn = QPushButton("导入")
+        close_btn = QPushButton("关闭")
+        button_layout.addWidget(load_file_btn)
+        button_layout.addStretch()
+        button_layout.addWidget(import_btn)
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+
+        status_text = {
+            "added": "✓ 已添加",
+            "valid": "✓ 验证通过",
+            "exists": "- 已存在",
+            "duplicate": "- 重复",
+            "invalid": "✗ 无法识别",
+            "failed": "✗ 验证失败",
+            "skipped": "… 已跳过",
+        }
+        items = {}  # {行号: QListWidgetItem}
+
+        def show_item(result):
+            text = f"第 {result['line']} 行  {status_text.get(result['status'], '')}  "
+            text += result["name"] or result["input"]
+            if result["message"]:
+                text += f"  ({result['message']})"
+
+            item = items.get(result["line"])
+            if item is None:
+                item = QListWidgetItem(text)
+                items[result["line"]] = item
+                results_list.addItem(item)
+            else:
+                item.setText(text)
+
+            if result["status"] in ("invalid", "failed", "skipped"):
+                item.setForeground(QColor("red"))
+            elif result["status"] in ("added", "valid"):
+                item.setForeground(QColor("green"))
+
+        def load_file():
+            path, _ = QFileDialog.getOpenFileName(
+                dialog, "选择合集列表文件", "", "文本文件 (*.txt *.csv);;所有文件 (*)"
+            )
+            if not path:
+                return
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    text_input.setPlainText(f.read())
+            except Exception as e:
+                QMessageBox.warning(dialog, "错误", f"读取文件失败: {str(e)}")
+
+        def start_import():
+            text = text_input.toPlainText()
+            if not text.strip():
+                QMessageBox.warning(dialog, "提示", "请输入或加载要导入的合集")
+                return
+
+            if not self.wallpaper_manager.unsplash_access_key:
+                QMessageBox.warning(dialog, "提示", "请先在基本设置中输入API密钥")
+                return
+
+            import_btn.setEnabled(False)
+            import_btn.setText("导入中...")
+            results_list.clear()
+            items.clear()
+            summary_label.setText("正在验证...")
+
+            # 在后台验证，每完成一项就显示结果
+            self.wallpaper_manager.run_async(
+                self.wallpaper_manager.import_collections,
+                text,
+                on_progress=show_item,
+                on_result=on_imported,
+                on_error=on_import_error,
+            )
+
+        def on_imported(results):
+            for result in results:
+                show_item(result)
+
+            counts = {}
+            for result in results:
+                counts[result["status"]] = counts.get(result["status"], 0) + 1
+
+            summary = f"共 {len(results)} 项：添加 {counts.get('added', 0)} 项"
+            for status, label in (
+                ("exists", "已存在"),
+                ("duplicate", "重复"),
+                ("invalid", "无法识别"),
+                ("failed", "验证失败"),
+                ("skipped", "配额不足跳过"),
+            ):
+                if counts.get(status):
+                    summary += f"，{label} {counts[status]} 项"
+            summary_label.setText(summary)
+
+            import_btn.setEnabled(True)
+            import_btn.setText("导入")
+
+            # 重新加载合集列表
+            if counts.get("added"):
+                self.load_popular_collections()
+
+        def on_import_error(message):
+            summary_label.setText(f"导入失败: {message}")
+            import_btn.setEnabled(True)
+            import_btn.setText("导入")
+
+        # 连接事件
+        load_file_btn.clicked.connect(load_file)
+        import_btn.clicked.connect(start_import)
+        close_btn.clicked.connect(dialog.reject)
+
+        # 显示对话框
+        dialog.exec_()
+
     def manage_custom_collections_dialog(self):
         """管理自定义合集对话框"""
         print("manage_custom_collections_dialog 被调用")  # 调试信息
@@ -1382,70 +1754,11 @@ class MainWindow(QMainWindow):
 
     def extract_collection_id_from_url(self, url):
         """从URL中提取合集ID"""
-        import re
-
-        print(f"正在提取URL中的合集ID: {url}")  # 调试信息
-
-        try:
-            # 清理URL，移除多余的空格和换行
-            url = url.strip()
-
-            # 更新的正则表达式模式，支持字母数字混合ID
-            patterns = [
-                # 新格式：字母数字混合ID（11位左右）
-                r"unsplash\.com/collections/([a-zA-Z0-9_-]+)",  # 标准Unsplash URL
-                r"unsplash\.com/@[^/]+/collections/([a-zA-Z0-9_-]+)",  # 用户合集URL
-                r"/collections/([a-zA-Z0-9_-]+)",  # 路径中的合集
-                r"collections/([a-zA-Z0-9_-]+)",  # 简单的合集路径
-                # 旧格式：纯数字ID（向后兼容）
-                r"unsplash\.com/collections/(\d+)",  # 旧的数字ID格式
-                r"unsplash\.com/@[^/]+/collections/(\d+)",  # 旧的用户合集
-                r"/collections/(\d+)",  # 旧的路径格式
-                r"collections/(\d+)",  # 旧的简单路径
-                r"collection/(\d+)",  # 单数形式（不太常见）
-            ]
-
-            for i, pattern in enumerate(patterns):
-                match = re.search(pattern, url, re.IGNORECASE)
-                if match:
-                    collection_id = match.group(1)
-                    print(f"使用模式 {i+1} 提取到合集ID: {collection_id}")
-
-                    # 验证提取的ID格式是否合理
-                    if self._is_valid_collection_id(collection_id):
-                        return collection_id
-                    else:
-                        print(f"提取的ID格式不合理: {collection_id}")
-                        continue
-
-            # 如果输入的就是一个ID（数字或字母数字混合）
-            if self._is_valid_collection_id(url):
-                print(f"输入的就是合集ID: {url}")
-                return url
-
-            print("无法从URL中提取合集ID")
-            return None
-
-        except Exception as e:
-            print(f"提取合集ID失败: {e}")
-            return None
+        return self.wallpaper_manager.extract_collection_id(url)
 
     def _is_valid_collection_id(self, collection_id):
         """验证合集ID格式是否有效"""
-        import re
-
-        if not collection_id:
-            return False
-
-        # 新格式：字母数字混合，通常11位左右
-        if re.match(r"^[a-zA-Z0-9_-]{8,15}$", collection_id):
-            return True
-
-        # 旧格式：纯数字，通常6-8位
-        if re.match(r"^\d{4,10}$", collection_id):
-            return True
-
-        return False
+        return self.wallpaper_manager.is_valid_collection_id(collection_id)
 
     def on_collection_changed(self, collection_name):
         """合集选择改变"""
@@ -1455,6 +1768,7 @@ class MainWindow(QMainWindow):
         ):
             self.settings.set_setting("selected_collection", "")
             self.collection_info_label.setText("请选择一个合集")
+            self.wallpaper_manager.schedule_prefetch()
             return
 
         # 获取选中的合集ID
@@ -1465,6 +1779,7 @@ class MainWindow(QMainWindow):
         if collection_id == "separator":
             self.settings.set_setting("selected_collection", "")
             self.collection_info_label.setText("请选择一个合集")
+            self.wallpaper_manager.schedule_prefetch()
             return
 
         if collection_id:
@@ -1478,6 +1793,9 @@ class MainWindow(QMainWindow):
         else:
             self.settings.set_setting("selected_collection", "")
 
+        # 切换合集后清空旧合集的预取队列，并开始预取新合集
+        self.wallpaper_manager.schedule_prefetch()
+
     def get_collection_name_by_id(self, collection_id):
         """根据ID获取合集名称"""
         for i in range(self.collection_combo.count()):
@@ -1486,17 +1804,31 @@ class MainWindow(QMainWindow):
         return "未知合集"
 
     def load_collection_preview(self, collection_id):
-        """加载合集预览信息"""
-        try:
-            # 获取合集信息（如果是已添加的合集会使用缓存）
-            is_custom_collection = collection_id in [
-                self.collection_combo.itemData(i)
-                for i in range(self.collection_combo.count())
-            ]
-            collection_info = self.wallpaper_manager.get_collection_info(
-                collection_id, cache_if_added=is_custom_collection
-            )
+        """加载合集预览信息（在后台获取，完成后更新界面）"""
+        self._preview_collection_id = collection_id
+
+        # 获取合集信息（如果是已添加的合集会使用缓存）
+        is_custom_collection = collection_id in [
+            self.collection_combo.itemData(i)
+            for i in range(self.collection_combo.count())
+        ]
+        self.wallpaper_manager.run_async(
+            self.wallpaper_manager.get_collection_info,
+            collection_id,
+            cache_if_added=is_custom_collection,
+            on_result=lambda info: self.show_collection_preview(collection_id, info),
+            on_error=lambda message: self.show_collection_preview_error(
+                collection_id, message
+            ),
+        )
+
+    def show_collection_preview(self, collection_id, collection_info):
+        """显示合集预览信息"""
+        # 加载期间已切换到其他合集，丢弃过期结果
+        if collection_id != getattr(self, "_preview_collection_id", None):
+            return
 
+        try:
             if collection_info:
                 # 格式化描述
                 description = collection_info.get("description", "")
@@ -1558,10 +1890,14 @@ class MainWindow(QMainWindow):
                 self.collection_preview_label.setTextFormat(Qt.RichText)
                 self.collection_preview_label.setWordWrap(True)
 
+                self.show_collection_cover(
+                    collection_id, collection_info.get("cover_photo", "")
+                )
                 print(f"已加载合集预览: {title}")
 
             else:
                 # 如果获取信息失败，显示基本信息
+                self.collection_cover_label.hide()
                 loading_html = f"""
                 <div style="font-family: 'Microsoft YaHei', 'SimHei', Arial, sans-serif; text-align: center;">
                     <p style="margin: 0 0 12px 0; font-size: 13px; color: #f39c12;">
@@ -1590,35 +1926,74 @@ class MainWindow(QMainWindow):
                 )
 
         except Exception as e:
-            print(f"加载合集预览失败: {e}")
+            self.show_collection_preview_error(collection_id, str(e))
 
-            # 显示错误信息
-            error_html = f"""
-            <div style="font-family: 'Microsoft YaHei', 'SimHei', Arial, sans-serif; text-align: center;">
-                <p style="margin: 0 0 12px 0; font-size: 13px; color: #e74c3c;">
-                    ❌ 预览加载失败
-                </p>
-                <p style="margin: 0 0 8px 0; font-size: 12px; color: #c0392b;">
-                    合集ID: {collection_id}
-                </p>
-                <p style="margin: 0; font-size: 11px; color: #c0392b;">
-                    🔄 请检查网络连接或稍后重试
-                </p>
-            </div>
-            """
+    def show_collection_cover(self, collection_id, cover_url):
+        """异步加载合集封面（缓存命中时立即显示）"""
+        self.collection_cover_label.clear()
+        if not cover_url:
+            self.collection_cover_label.hide()
+            return
 
-            self.collection_preview_label.setText(error_html)
-            self.collection_preview_label.setTextFormat(Qt.RichText)
+        self.collection_cover_label.show()
+        size = self.collection_cover_label.size()
+        self.thumbnail_loader.load(
+            cover_url,
+            size.width(),
+            size.height(),
+            lambda pixmap: self.set_collection_cover(collection_id, pixmap),
+        )
 
-            self.collection_preview_label.setStyleSheet(
-                "QLabel {"
-                "   border: 1px solid #e74c3c;"
-                "   background-color: #fdf2f2;"
-                "   padding: 16px;"
-                "   border-radius: 8px;"
-                "   font-family: 'Microsoft YaHei', 'SimHei', Arial, sans-serif;"
-                "}"
-            )
+    def set_collection_cover(self, collection_id, pixmap):
+        # 加载期间已切换到其他合集，丢弃过期结果
+        if collection_id != getattr(self, "_preview_collection_id", None):
+            return
+        self.collection_cover_label.setPixmap(pixmap)
+
+    def show_collection_preview_error(self, collection_id, message):
+        """显示合集预览加载失败信息"""
+        if collection_id != getattr(self, "_preview_collection_id", None):
+            return
+
+        print(f"加载合集预览失败: {message}")
+        self.collection_cover_label.hide()
+
+        # 显示错误信息
+        error_html = f"""
+        <div style="font-family: 'Microsoft YaHei', 'SimHei', Arial, sans-serif; text-align: center;">
+            <p style="margin: 0 0 12px 0; font-size: 13px; color: #e74c3c;">
+                ❌ 预览加载失败
+            </p>
+            <p style="margin: 0 0 8px 0; font-size: 12px; color: #c0392b;">
+                合集ID: {collection_id}
+            </p>
+            <p style="margin: 0; font-size: 11px; color: #c0392b;">
+                🔄 请检查网络连接或稍后重试
+            </p>
+        </div>
+        """
+
+        self.collection_preview_label.setText(error_html)
+        self.collection_preview_label.setTextFormat(Qt.RichText)
+
+        self.collection_preview_label.setStyleSheet(
+            "QLabel {"
+            "   border: 1px solid #e74c3c;"
+            "   background-color: #fdf2f2;"
+            "   padding: 16px;"
+            "   border-radius: 8px;"
+            "   font-family: 'Microsoft YaHei', 'SimHei', Arial, sans-serif;"
+            "}"
+        )
+
+    def update_resolution_info(self):
+        """显示主屏幕的物理分辨率（屏幕变化时自动更新）"""
+        screens = self.wallpaper_manager.screen_info.screens()
+        width, height = self.wallpaper_manager.get_screen_resolution()["base"]
+        if len(screens) > 1:
+            self.res_info.setText(f"{width} x {height} (自动检测，共 {len(screens)} 个屏幕)")
+        else:
+            self.res_info.setText(f"{width} x {height} (自动检测)")
 
     def browse_save_path(self):
         """浏览壁纸保存路径"""
@@ -1680,42 +2055,46 @@ class MainWindow(QMainWindow):
     def on_wallpaper_changed(self, image_path):
         """壁纸更换事件"""
         if os.path.exists(image_path):
-            try:
-                pixmap = QPixmap(image_path)
-                if not pixmap.isNull():
-                    # 计算合适的预览尺寸
-                    label_size = self.preview_label.size()
-                    if label_size.width() > 0 and label_size.height() > 0:
-                        scaled_pixmap = pixmap.scaled(
-                            label_size.width() - 10,
-                            label_size.height() - 10,
-                            Qt.KeepAspectRatio,
-                            Qt.SmoothTransformation,
-                        )
-                        self.preview_label.setPixmap(scaled_pixmap)
-                    else:
-                        # 如果label尺寸还没有确定，使用固定尺寸
-                        scaled_pixmap = pixmap.scaled(
-                            300, 200, Qt.KeepAspectRatio, Qt.SmoothTransformation
-                        )
-                        self.preview_label.setPixmap(scaled_pixmap)
-                else:
-                    self.preview_label.setText("无法加载壁纸预览")
-            except Exception as e:
-                print(f"更新壁纸预览时出错: {e}")
-                self.preview_label.setText("预览加载失败")
+            width, height = self.preview_target_size()
+            self.preview_loader.load(
+                image_path,
+                width,
+                height,
+                on_loaded=self.show_preview,
+                on_failed=self.show_preview_error,
+            )
         else:
             self.preview_label.setText("壁纸文件不存在")
 
+    def preview_target_size(self):
+        """计算合适的预览尺寸"""
+        label_size = self.preview_label.size()
+        if label_size.width() > 10 and label_size.height() > 10:
+            return label_size.width() - 10, label_size.height() - 10
+        # 如果label尺寸还没有确定，使用固定尺寸
+        return 300, 200
+
+    def show_preview(self, pixmap):
+        """显示解码好的预览（解码尺寸接近显示尺寸，这里的缩放开销很小）"""
+        width, height = self.preview_target_size()
+        self.preview_label.setPixmap(
+            pixmap.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        )
+
+    def show_preview_error(self, message):
+        print(f"更新壁纸预览时出错: {message}")
+        self.preview_label.setText("无法加载壁纸预览")
+
+    def refresh_preview(self):
+        """按当前窗口大小重新显示预览"""
+        if self.wallpaper_manager.current_wallpaper:
+            self.on_wallpaper_changed(self.wallpaper_manager.current_wallpaper)
+
     def resizeEvent(self, event):
         """窗口大小改变事件"""
         super().resizeEvent(event)
-        # 窗口大小改变时更新预览
-        if (
-            hasattr(self.wallpaper_manager, "current_wallpaper")
-            and self.wallpaper_manager.current_wallpaper
-        ):
-            self.on_wallpaper_changed(self.wallpaper_manager.current_wallpaper)
+        # 拖动窗口边缘时会连续触发，停止调整后再刷新预览
+        self.preview_resize_timer.start()
 
     def add_user_likes_dialog(self):
         """添加用户likes对话框"""
@@ -0,0 +1,427 @@
+import os
+import re
+import json
+import time
+import random
+import tempfile
+import threading
+import requests
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlencode, urlsplit
+from requests.adapters import HTTPAdapter
+from rate_limiter import INTERACTIVE, BACKGROUND
+from circuit_breaker import CircuitBreaker
+
+
+class IncompleteDownloadError(requests.exceptions.RequestException):
+    """下载的数据不完整（长度不符或图片被截断）"""
+
+
+class RateLimitExceeded(requests.exceptions.RequestException):
+    """API请求配额不足，请求没有发出"""
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """接口连续失败后被熔断，请求没有发出"""
+
+
+# 可以重试的临时错误：连接失败、超时、传输中断、服务器错误
+RETRYABLE_EXCEPTIONS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    IncompleteDownloadError,
+)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def parse_retry_after(response):
+    """读取 Retry-After 响应头（秒数或HTTP日期），没有或无法解析时返回None"""
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HttpClient:
+    """所有Unsplash请求共用的HTTP客户端
+
+    使用同一个 requests.Session，按主机维护连接池并保持长连接，
+    避免每次请求都重新进行TCP和TLS握手。临时错误按指数退避（全抖动）
+    重试，每个接口（主机 + 第一级路径）有独立的熔断器。
+    """
+
+    def __init__(
+        self,
+        pool_size=8,
+        timeout=10,
+        download_timeout=60,
+        connect_timeout=5,
+        max_retries=3,
+        backoff_base=0.5,
+        backoff_cap=8,
+        failure_threshold=5,
+        reset_timeout=60,
+        cache_store=None,
+        cache_policy=(),
+        rate_limiter=None,
+        rate_limited_hosts=("api.unsplash.com",),
+        background_max_wait=30,
+        bandwidth_estimator=None,
+    ):
+        self.connect_timeout = connect_timeout  # 建立连接超时（秒）
+        self.timeout = timeout  # API请求读取超时（秒）
+        self.download_timeout = download_timeout  # 图片下载读取超时（秒）
+
+        # 重试和熔断
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers = {}  # {接口名: CircuitBreaker}
+        self._stats = {"requests": 0, "retries": 0, "failures": 0, "circuit_rejections": 0}
+        self._stats_lock = threading.Lock()
+
+        # 响应缓存：cache_policy 为 [(路径正则, 有效期秒数), ...]
+        self.cache_store = cache_store
+        self.cache_policy = [(re.compile(pattern), max_age) for pattern, max_age in cache_policy]
+
+        # 请求配额：只有 rate_limited_hosts 上的请求计入（图片下载不计入）
+        # 请求的优先级按线程保存，在 background() 中发出的请求为后台请求
+        self.rate_limiter = rate_limiter
+        self.rate_limited_hosts = set(rate_limited_hosts)
+        self.background_max_wait = background_max_wait
+        self._local = threading.local()
+
+        # 图片下载的吞吐量和延迟统计（用于按网速选择画质）
+        self.bandwidth_estimator = bandwidth_estimator
+
+        self.session = requests.Session()
+        # pool_connections: 缓存的主机连接池数量（api / images 等）
+        # pool_maxsize: 每个主机最多保持的连接数，应不小于并发线程数
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Accept-Version": "v1"})
+
+    @property
+    def priority(self):
+        """当前线程发出的请求的优先级"""
+        return getattr(self._local, "priority", INTERACTIVE)
+
+    @contextmanager
+    def prioritized(self, priority):
+        """在此上下文中，当前线程发出的请求使用指定的优先级"""
+        previous = self.priority
+        self._local.priority = priority
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def wrap_current_priority(self, fn):
+        """包装 fn，使它在其他线程（如线程池）中执行时沿用当前线程的请求优先级"""
+        priority = self.priority
+
+        def run(*args, **kwargs):
+            with self.prioritized(priority):
+                return fn(*args, **kwargs)
+
+        return run
+
+    def background(self):
+        """在此上下文中发出的请求按后台优先级调度（预取、索引等）"""
+        return self.prioritized(BACKGROUND)
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        """发送API请求，临时错误自动重试
+
+        配额不足时抛出 RateLimitExceeded：用户操作只在配额完全用尽时被拒绝，
+        后台请求在配额低于保留值时等待，超过 background_max_wait 后放弃。
+        重试用尽后，服务器错误照常返回响应，连接错误抛出异常。
+        """
+        if timeout is None:
+            timeout = self.timeout
+
+        limited = (
+            self.rate_limiter is not None
+            and urlsplit(url).hostname in self.rate_limited_hosts
+        )
+
+        def attempt():
+            # 每次尝试（包括重试）都计入配额
+            if limited:
+                priority = self.priority
+                wait = self.background_max_wait if priority == BACKGROUND else 0
+                if not self.rate_limiter.acquire(priority, timeout=wait):
+                    raise RateLimitExceeded(
+                        f"API请求配额不足，已取消{'后台' if priority == BACKGROUND else ''}请求: "
+                        f"{urlsplit(url).path}"
+                    )
+
+            response = self.session.get(
+                url, params=params, timeout=(self.connect_timeout, timeout), **kwargs
+            )
+            if limited:
+                self.rate_limiter.update_from_headers(response.headers)
+            return response
+
+        return self._with_retries(url, attempt)
+
+    def get_json(self, url, params=None):
+        """发送API请求并返回JSON，按缓存策略使用响应缓存
+
+        在有效期内直接返回缓存；过期后携带 If-None-Match / If-Modified-Since
+        重新验证，服务器返回304时继续使用缓存。没有匹配策略的地址不缓存。
+        """
+        max_age = self._get_max_age(url)
+        if max_age is None or self.cache_store is None:
+            response = self.get(url, params=params)
+            response.raise_for_status()
+            return response.json()
+
+        cache_key = self._make_cache_key(url, params)
+        cached = self.cache_store.get_http_response(cache_key)
+
+        headers = {}
+        if cached:
+            body, etag, last_modified, fetched_time = cached
+            if time.time() - fetched_time < max_age:
+                return json.loads(body)
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        response = self.get(url, params=params, headers=headers)
+        if cached and response.status_code == 304:
+            self.cache_store.touch_http_response(cache_key)
+            return json.loads(cached[0])
+
+        response.raise_for_status()
+        self.cache_store.save_http_response(
+            cache_key,
+            response.text,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+        return response.json()
+
+    def _get_max_age(self, url):
+        """根据请求路径查找缓存有效期，没有匹配的策略时返回None"""
+        path = urlsplit(url).path
+        for pattern, max_age in self.cache_policy:
+            if pattern.search(path):
+                return max_age
+        return None
+
+    def _make_cache_key(self, url, params):
+        """缓存键不包含 client_id，更换API密钥后缓存仍然可用"""
+        params = {
+            key: value for key, value in (params or {}).items() if key != "client_id"
+        }
+        return f"{url}?{urlencode(sorted(params.items()))}"
+
+    def _get_breaker(self, url):
+        """获取URL所属接口的熔断器
+
+        API主机按 主机 + 第一级路径 区分，如 api.unsplash.com/photos；
+        图片CDN等其他主机的第一级路径是照片ID，按主机共用一个熔断器，
+        否则每张图片一个熔断器，既无法熔断，数量也会无限增长。
+        """
+        parts = urlsplit(url)
+        name = parts.hostname
+        if parts.hostname in self.rate_limited_hosts:
+            segment = parts.path.strip("/").split("/", 1)[0]
+            if segment:
+                name = f"{parts.hostname}/{segment}"
+
+        with self._stats_lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    name, self.failure_threshold, self.reset_timeout
+                )
+                self._breakers[name] = breaker
+            return breaker
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _with_retries(self, url, attempt):
+        """执行 attempt()，遇到临时错误时按指数退避重试
+
+        attempt 返回响应（状态码为 RETRYABLE_STATUS 时重试）或其他结果，
+        失败时抛出异常。接口被熔断时抛出 CircuitOpenError。
+        服务器给出 Retry-After 时至少等待这么久；等待时间超过退避上限，
+        或 429 没有给出 Retry-After 时不再重试，避免继续消耗配额。
+        """
+        breaker = self._get_breaker(url)
+        retries = 0
+        while True:
+            if not breaker.allow():
+                self._count("circuit_rejections")
+                raise CircuitOpenError(
+                    f"接口暂时不可用，{breaker.retry_after():.0f} 秒后再试: {breaker.name}"
+                )
+
+            self._count("requests")
+            error = None
+            result = None
+            try:
+                result = attempt()
+            except RETRYABLE_EXCEPTIONS as e:
+                error = e
+            except requests.exceptions.HTTPError as e:
+                if e.response is None or e.response.status_code not in RETRYABLE_STATUS:
+                    breaker.record_success()  # 服务器正常响应，只是请求本身有问题
+                    raise
+                error = e
+            except BaseException:
+                # 配额不足等没有发出请求的情况，不计入熔断器
+                breaker.release()
+                raise
+
+            status = getattr(result, "status_code", None)
+            if error is None and status not in RETRYABLE_STATUS:
+                breaker.record_success()
+                return result
+
+            breaker.record_failure()
+            response = result if result is not None else getattr(error, "response", None)
+            status = getattr(response, "status_code", None)
+            retry_after = parse_retry_after(response)
+            if retry_after is None:
+                give_up = status == 429
+            else:
+                give_up = retry_after > self.backoff_cap
+
+            # 重试用尽、接口已被熔断或需要等待太久时不再重试
+            if give_up or retries >= self.max_retries or breaker.retry_after() > 0:
+                self._count("failures")
+                if error is not None:
+                    raise error
+                return result
+
+            # 全抖动：在 [0, min(上限, 基数 * 2^n)] 内随机等待，避免同时重试
+            delay = random.uniform(
+                0, min(self.backoff_cap, self.backoff_base * 2 ** retries)
+            )
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            retries += 1
+            self._count("retries")
+            print(
+                f"请求失败（{error or f'HTTP {status}'}），"
+                f"{delay:.1f} 秒后第 {retries}/{self.max_retries} 次重试: {breaker.name}"
+            )
+            if result is not None:
+                result.close()
+            time.sleep(delay)
+
+    def probe(self, url, timeout=None):
+        """检测能否连接到服务器（收到任何HTTP响应即可），不重试、不计入配额"""
+        if timeout is None:
+            timeout = self.connect_timeout
+        try:
+            self.session.head(url, timeout=(timeout, timeout)).close()
+            return True
+        except requests.exceptions.RequestException:
+            return False
+
+    def get_diagnostics(self):
+        """获取请求统计、熔断器状态和配额状态"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            breakers = list(self._breakers.values())
+
+        diagnostics = {
+            "stats": stats,
+            "breakers": {breaker.name: breaker.status() for breaker in breakers},
+        }
+        if self.rate_limiter is not None:
+            diagnostics["rate_limit"] = self.rate_limiter.status()
+        return diagnostics
+
+    def download_to_file(self, url, dest_path, timeout=None, chunk_size=64 * 1024):
+        """流式下载到同目录的临时文件，校验完整后原子地替换为目标文件
+
+        内存占用只与块大小有关，与图片大小无关；下载失败或不完整时
+        目标路径不会出现半截文件，并按重试策略重新下载。返回写入的字节数。
+        """
+        if timeout is None:
+            timeout = self.download_timeout
+
+        return self._with_retries(
+            url, lambda: self._download_once(url, dest_path, timeout, chunk_size)
+        )
+
+    def _download_once(self, url, dest_path, timeout, chunk_size):
+        """下载一次，失败时删除临时文件并抛出异常"""
+        fd, temp_path = tempfile.mkstemp(
+            prefix=".download_", suffix=".part", dir=os.path.dirname(dest_path)
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                started = time.monotonic()
+                with self.session.get(
+                    url, timeout=(self.connect_timeout, timeout), stream=True
+                ) as response:
+                    response.raise_for_status()
+                    first_response = time.monotonic()
+
+                    written = 0
+                    tail = b""
+                    for chunk in response.iter_content(chunk_size):
+                        if not chunk:
+                            continue
+                        f.write(chunk)
+                        written += len(chunk)
+                        tail = (tail + chunk)[-2:]
+
+                    headers = response.headers
+                    finished = time.monotonic()
+                f.flush()
+                os.fsync(f.fileno())
+
+            # 校验长度（压缩传输时解码后的长度与Content-Length不同，跳过）
+            expected = headers.get("Content-Length")
+            encoding = headers.get("Content-Encoding", "identity")
+            if expected and encoding == "identity" and written != int(expected):
+                raise IncompleteDownloadError(
+                    f"下载不完整: 预期 {expected} 字节，实际 {written} 字节"
+                )
+
+            # 校验JPEG结束标记
+            content_type = headers.get("Content-Type", "")
+            if "jpeg" in content_type and tail != b"\xff\xd9":
+                raise IncompleteDownloadError("JPEG图片被截断（缺少结束标记）")
+
+            os.replace(temp_path, dest_path)
+
+            if self.bandwidth_estimator is not None:
+                self.bandwidth_estimator.record_transfer(
+                    written, finished - first_response, first_response - started
+                )
+            return written
+
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def close(self):
+        """关闭所有连接"""
+        self.session.close()
@@ -0,0 +1,191 @@
+import os
+import re
+import json
+import threading
+from collections import OrderedDict
+
+
+class ImageCache:
+    """按Unsplash照片ID和尺寸索引的本地图片缓存
+
+    索引保存在内存中（按最近使用排序），并持久化到 index.json，
+    超出字节数或数量上限时按LRU淘汰，无需扫描目录。
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, directory, max_bytes=500 * 1024 * 1024, max_entries=200):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._entries = OrderedDict()  # {key: 文件大小}，最近使用的在末尾
+        self._total_bytes = 0
+        self._dirty = False  # 使用顺序有变化但尚未写入索引文件
+        self._lock = threading.Lock()
+
+        self._remove_partial_downloads()
+        self._load_index()
+
+    @staticmethod
+    def make_key(photo_id, width, height):
+        """生成缓存键：照片ID + 请求尺寸"""
+        return f"{photo_id}_{width}x{height}"
+
+    @staticmethod
+    def is_variant_key(key):
+        """是否为按请求尺寸生成的图片（而不是母版或固定尺寸版本）"""
+        return re.search(r"_\d+x\d+$", key) is not None
+
+    @staticmethod
+    def make_master_key(photo_id):
+        """生成母版的缓存键（各尺寸的图片都从母版生成）"""
+        return f"{photo_id}_master"
+
+    @staticmethod
+    def make_rendition_key(photo_id, name):
+        """生成Unsplash固定尺寸版本（如 regular）的缓存键"""
+        return f"{photo_id}_{name}"
+
+    def path_for(self, key):
+        """获取缓存键对应的文件路径"""
+        return os.path.join(self.directory, f"{key}.jpg")
+
+    def get(self, key):
+        """查找缓存，命中时返回文件路径并标记为最近使用"""
+        with self._lock:
+            if key not in self._entries:
+                return None
+
+            path = self.path_for(key)
+            if not os.path.exists(path):
+                # 文件被外部删除，同步索引
+                self._total_bytes -= self._entries.pop(key)
+                self._save_index()
+                return None
+
+            # 命中只改变使用顺序，不立即写文件；下次写入或 flush() 时一起保存
+            self._entries.move_to_end(key)
+            self._dirty = True
+            return path
+
+    def put(self, key, protected=()):
+        """登记已写入 path_for(key) 的文件，并在超出容量时淘汰旧文件
+
+        protected 中的路径（如当前壁纸、预取队列中的图片）不会被淘汰。
+        """
+        path = self.path_for(key)
+        size = os.path.getsize(path)
+
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)
+            self._entries[key] = size
+            self._total_bytes += size
+
+            self._evict(set(protected) | {path})
+            self._save_index()
+        return path
+
+    def remove(self, key):
+        """删除一个缓存项"""
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)
+                self._delete_file(self.path_for(key))
+                self._save_index()
+
+    def stats(self):
+        """获取缓存统计信息"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _evict(self, protected):
+        """从最久未使用的开始淘汰，直到满足容量限制"""
+        for key in list(self._entries):
+            if (
+                self._total_bytes <= self.max_bytes
+                and len(self._entries) <= self.max_entries
+            ):
+                break
+
+            path = self.path_for(key)
+            if path in protected:
+                continue
+
+            self._total_bytes -= self._entries.pop(key)
+            self._delete_file(path)
+            print(f"淘汰缓存图片: {key}")
+
+    def _delete_file(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _load_index(self):
+        """加载索引，索引不存在或损坏时扫描一次目录重建"""
+        index_path = os.path.join(self.directory, self.INDEX_FILE)
+        entries = None
+
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"图片缓存索引损坏，重新扫描: {e}")
+
+        if entries is None:
+            entries = []
+            files = []
+            for filename in os.listdir(self.directory):
+                if filename.endswith(".jpg"):
+                    path = os.path.join(self.directory, filename)
+                    files.append((os.path.getmtime(path), filename[:-4], path))
+            for _, key, path in sorted(files):
+                entries.append([key, os.path.getsize(path)])
+
+        for key, size in entries:
+            if os.path.exists(self.path_for(key)):
+                self._entries[key] = size
+                self._total_bytes += size
+
+        print(
+            f"图片缓存: {len(self._entries)} 张, "
+            f"{self._total_bytes / 1024 / 1024:.1f} MB"
+        )
+
+    def flush(self):
+        """把尚未保存的使用顺序写入索引文件（退出时调用）"""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def _save_index(self):
+        """原子地写入索引文件"""
+        self._dirty = False
+        index_path = os.path.join(self.directory, self.INDEX_FILE)
+        temp_path = index_path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    [[key, size] for key, size in self._entries.items()], f
+                )
+            os.replace(temp_path, index_path)
+        except OSError as e:
+            print(f"保存图片缓存索引失败: {e}")
+
+    def _remove_partial_downloads(self):
+        """删除上次异常退出时遗留的未完成下载"""
+        try:
+            for filename in os.listdir(self.directory):
+                if filename.startswith(".download_") and filename.endswith(".part"):
+                    os.remove(os.path.join(self.directory, filename))
+        except OSError as e:
+            print(f"清理未完成的下载时出错: {e}")
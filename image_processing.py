@@ -0,0 +1,66 @@
+import os
+import math
+import tempfile
+
+
+def is_available():
+    """是否可以在本地处理图片（需要 Pillow）"""
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def image_size(path):
+    """读取图片尺寸（只解析文件头）"""
+    from PIL import Image
+
+    with Image.open(path) as image:
+        return image.size
+
+
+def master_size(photo_size, targets):
+    """计算能覆盖所有目标尺寸的最小母版尺寸（不超过原图）
+
+    母版保持原图比例，按“铺满裁剪”的方式缩放到每个目标尺寸时都不需要放大。
+    """
+    photo_width, photo_height = photo_size
+    scale = max(
+        max(width / photo_width, height / photo_height) for width, height in targets
+    )
+    scale = min(scale, 1.0)
+    return math.ceil(photo_width * scale), math.ceil(photo_height * scale)
+
+
+def covers(master, target, photo_size):
+    """母版是否足够生成目标尺寸（母版已是原图大小时也视为足够）"""
+    master_width, master_height = master
+    width, height = target
+    if master_width >= width and master_height >= height:
+        return True
+    return master_width >= photo_size[0]
+
+
+def make_variant(master_path, dest_path, size, quality=90):
+    """从母版缩放并居中裁剪出指定尺寸，原子地写入 dest_path"""
+    from PIL import Image, ImageOps
+
+    fd, temp_path = tempfile.mkstemp(
+        prefix=".download_", suffix=".part", dir=os.path.dirname(dest_path)
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            with Image.open(master_path) as image:
+                # 先按目标尺寸的2倍粗略缩小再精细缩放，大图时更快
+                image.draft("RGB", (size[0] * 2, size[1] * 2))
+                variant = ImageOps.fit(image.convert("RGB"), size, Image.LANCZOS)
+            variant.save(f, "JPEG", quality=quality, optimize=True)
+        os.replace(temp_path, dest_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return dest_path
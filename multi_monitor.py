@@ -0,0 +1,105 @@
+import os
+import time
+import platform
+import subprocess
+
+
+def supports_per_screen():
+    """当前桌面是否支持为每个屏幕单独设置壁纸"""
+    return platform.system() == "Darwin"
+
+
+def _desktop_display_names():
+    """System Events 中各桌面对应的显示器名称（按桌面顺序）"""
+    script = "\n".join(
+        [
+            'tell application "System Events"',
+            "set AppleScript's text item delimiters to linefeed",
+            "return (display name of every desktop) as text",
+            "end tell",
+        ]
+    )
+    result = subprocess.run(
+        ["osascript", "-e", script], check=True, capture_output=True, text=True
+    )
+    return [name.strip() for name in result.stdout.strip().splitlines()]
+
+
+def set_per_screen_wallpapers(paths, screens, fallback_path):
+    """为每个屏幕单独设置壁纸（macOS）
+
+    System Events 的桌面顺序不一定与 Qt 的屏幕顺序相同，按显示器名称对应。
+    无法一一对应时（名称缺失或重复）所有桌面都使用 fallback_path，
+    避免某个屏幕显示按其他屏幕尺寸裁剪的图片。返回是否为每个屏幕分别设置。
+    """
+    paths_by_name = {screen["name"]: path for screen, path in zip(screens, paths)}
+    try:
+        desktop_names = _desktop_display_names()
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"获取桌面对应的显示器失败: {e}")
+        desktop_names = []
+
+    matched = (
+        len(paths_by_name) == len(screens)
+        and len(desktop_names) == len(screens)
+        and sorted(desktop_names) == sorted(paths_by_name)
+    )
+    if matched:
+        commands = [
+            f'set picture of desktop {index} to POSIX file "{paths_by_name[name]}"'
+            for index, name in enumerate(desktop_names, start=1)
+        ]
+    else:
+        print("无法按显示器名称对应桌面，所有屏幕使用同一张壁纸")
+        commands = [f'set picture of every desktop to POSIX file "{fallback_path}"']
+    script = "\n".join(
+        ['tell application "System Events"', *commands, "end tell"]
+    )
+    subprocess.run(["osascript", "-e", script], check=True)
+    return matched
+
+
+def compose_spanned(paths, screens, output_dir):
+    """把每个屏幕的图片按屏幕位置拼接成一张横跨所有屏幕的壁纸
+
+    screens 为 ScreenInfo.screens() 返回的屏幕信息，与 paths 一一对应。
+    需要 Pillow，未安装时返回None。
+    """
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        print("未安装 Pillow，无法合成多屏壁纸")
+        return None
+
+    # 屏幕坐标为逻辑像素，按各屏幕的缩放比例换算成物理像素
+    placements = []
+    for screen in screens:
+        ratio = screen["device_pixel_ratio"]
+        x = round(screen["x"] * ratio)
+        y = round(screen["y"] * ratio)
+        placements.append((x, y, screen["physical"]))
+
+    left = min(x for x, _, _ in placements)
+    top = min(y for _, y, _ in placements)
+    right = max(x + width for x, _, (width, _) in placements)
+    bottom = max(y + height for _, y, (_, height) in placements)
+
+    canvas = Image.new("RGB", (right - left, bottom - top))
+    for path, (x, y, size) in zip(paths, placements):
+        with Image.open(path) as image:
+            fitted = ImageOps.fit(image.convert("RGB"), size, Image.LANCZOS)
+        canvas.paste(fitted, (x - left, y - top))
+
+    # 每次使用新文件名，系统不会因为路径相同而继续显示旧图片
+    output_path = os.path.join(output_dir, f"spanned_{int(time.time() * 1000)}.jpg")
+    canvas.save(output_path, "JPEG", quality=92)
+
+    # 删除之前合成的壁纸
+    for filename in os.listdir(output_dir):
+        old_path = os.path.join(output_dir, filename)
+        if filename.startswith("spanned_") and old_path != output_path:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+    return output_path
@@ -0,0 +1,56 @@
+import os
+import random
+import threading
+from collections import deque
+
+
+class OfflineRotation:
+    """网络不可用时，从本地已下载的图片中轮换壁纸
+
+    每一轮把目录中的所有图片随机排列后依次使用，一轮结束前不会重复；
+    新的一轮开始时重新扫描目录，加入期间新下载的图片。
+    """
+
+    EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+    def __init__(self, get_directories, accept=None):
+        self.get_directories = get_directories  # 返回要扫描的目录列表
+        self.accept = accept  # 判断图片能否使用的函数（可选）
+        self._order = deque()
+        self._lock = threading.Lock()
+
+    def next(self, exclude=None):
+        """取出下一张图片，exclude（如当前壁纸）会被跳过；没有可用图片时返回None"""
+        with self._lock:
+            for new_round in (False, True):
+                if new_round:
+                    self._order = deque(self._scan())
+                    random.shuffle(self._order)
+
+                while self._order:
+                    path = self._order.popleft()
+                    if path != exclude and os.path.exists(path):
+                        return path
+            return None
+
+    def _scan(self):
+        """列出所有目录中的图片（不递归，忽略隐藏文件和未完成的下载）"""
+        paths = set()
+        for directory in self.get_directories():
+            if not directory or not os.path.isdir(directory):
+                continue
+            try:
+                filenames = os.listdir(directory)
+            except OSError as e:
+                print(f"读取本地壁纸目录失败: {e}")
+                continue
+
+            for filename in filenames:
+                if filename.startswith("."):
+                    continue
+                if not filename.lower().endswith(self.EXTENSIONS):
+                    continue
+                path = os.path.abspath(os.path.join(directory, filename))
+                if self.accept is None or self.accept(path):
+                    paths.add(path)
+        return list(paths)
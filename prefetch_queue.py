@@ -0,0 +1,94 @@
+import os
+import threading
+from collections import deque
+
+
+class PrefetchQueue:
+    """按壁纸来源维护的预取队列，队列中保存已下载完成、可直接应用的本地图片"""
+
+    def __init__(self, run_in_background, size=3):
+        self.size = size
+        self._run_in_background = run_in_background  # 提交后台任务的函数
+        self._queues = {}  # {来源: deque[图片路径]}
+        self._refilling = set()  # 正在后台补充的来源
+        self._cancelled = set()  # 已清空、正在补充的任务完成当前下载后停止
+        self._lock = threading.Lock()
+
+    def pop(self, source_key):
+        """取出一张预取好的壁纸，没有可用图片时返回None"""
+        with self._lock:
+            queue = self._queues.get(source_key)
+            while queue:
+                path = queue.popleft()
+                if os.path.exists(path):
+                    return path
+        return None
+
+    def count(self, source_key):
+        """获取某个来源当前已预取的数量"""
+        with self._lock:
+            return len(self._queues.get(source_key, ()))
+
+    def queued_paths(self):
+        """获取所有队列中的图片路径（清理旧文件时需要保留）"""
+        with self._lock:
+            return {path for queue in self._queues.values() for path in queue}
+
+    def clear(self, source_key=None):
+        """清空指定来源（或全部来源）的预取队列，并停止这些来源正在进行的补充"""
+        with self._lock:
+            if source_key is None:
+                self._queues.clear()
+                self._cancelled.update(self._refilling)
+            else:
+                self._queues.pop(source_key, None)
+                if source_key in self._refilling:
+                    self._cancelled.add(source_key)
+
+    def refill(self, source_key, fetch_func):
+        """在后台把指定来源的队列补充到预设数量
+
+        fetch_func 负责下载一张图片并返回本地路径，失败时返回None。
+        同一来源同时只会有一个补充任务。
+        """
+        if self.size <= 0:
+            return False
+
+        with self._lock:
+            if source_key in self._refilling:
+                # 清空后又切换回来，让正在进行的补充继续
+                self._cancelled.discard(source_key)
+                return False
+            if len(self._queues.get(source_key, ())) >= self.size:
+                return False
+            self._refilling.add(source_key)
+
+        self._run_in_background(self._refill_worker, source_key, fetch_func)
+        return True
+
+    def _refill_worker(self, source_key, fetch_func):
+        try:
+            while True:
+                with self._lock:
+                    if source_key in self._cancelled:
+                        break
+                    queue = self._queues.setdefault(source_key, deque())
+                    if len(queue) >= self.size:
+                        break
+
+                path = fetch_func()
+                if not path:
+                    print(f"预取壁纸失败，停止补充: {source_key}")
+                    break
+
+                with self._lock:
+                    if source_key in self._cancelled:
+                        break
+                    self._queues.setdefault(source_key, deque()).append(path)
+                print(f"已预取壁纸 ({self.count(source_key)}/{self.size}): {source_key}")
+        except Exception as e:
+            print(f"预取壁纸时发生错误: {e}")
+        finally:
+            with self._lock:
+                self._refilling.discard(source_key)
+                self._cancelled.discard(source_key)
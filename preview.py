@@ -0,0 +1,94 @@
+import os
+import math
+from collections import OrderedDict
+from PyQt5.QtCore import QObject, QThreadPool, Qt
+from PyQt5.QtGui import QImageReader, QPixmap
+from workers import Worker
+
+
+def decode_scaled(path, max_width, max_height):
+    """按目标尺寸直接解码图片（JPEG在解码时缩小，不会先解码完整的大图）
+
+    返回 QImage，可以在后台线程中调用。
+    """
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    size = reader.size()
+    if size.isValid():
+        size.scale(max_width, max_height, Qt.KeepAspectRatio)
+        reader.setScaledSize(size)
+
+    image = reader.read()
+    if image.isNull():
+        raise ValueError(f"无法解码图片: {reader.errorString()}")
+    return image
+
+
+class PreviewLoader(QObject):
+    """在后台线程中按显示尺寸解码图片，并缓存解码结果
+
+    缓存键为 (路径, 修改时间, 尺寸档位)：尺寸按 BUCKET 像素向上取整，
+    窗口大小的细微变化会复用同一个解码结果。QPixmap 只在GUI线程中创建。
+    """
+
+    BUCKET = 64
+
+    def __init__(self, max_entries=16):
+        super().__init__()
+        self.max_entries = max_entries
+        self._cache = OrderedDict()  # {缓存键: QPixmap}
+        self._request_id = 0
+
+        # 独立的单线程池，不会被正在进行的下载任务阻塞
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(1)
+
+    def bucket_size(self, width, height):
+        """把尺寸向上取整到档位"""
+        return (
+            max(self.BUCKET, math.ceil(width / self.BUCKET) * self.BUCKET),
+            max(self.BUCKET, math.ceil(height / self.BUCKET) * self.BUCKET),
+        )
+
+    def load(self, path, width, height, on_loaded, on_failed=None):
+        """加载 path 的预览，完成后在GUI线程中调用 on_loaded(QPixmap)
+
+        只有最近一次请求的结果会回调，之前未完成的请求结果只写入缓存。
+        """
+        self._request_id += 1
+        request_id = self._request_id
+
+        try:
+            key = (path, os.path.getmtime(path), self.bucket_size(width, height))
+        except OSError as e:
+            if on_failed:
+                on_failed(str(e))
+            return
+
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            on_loaded(self._cache[key])
+            return
+
+        worker = Worker(decode_scaled, path, *key[2])
+        worker.signals.result.connect(
+            lambda image: self._on_decoded(request_id, key, image, on_loaded)
+        )
+        if on_failed:
+            worker.signals.error.connect(
+                lambda message: self._on_failed(request_id, message, on_failed)
+            )
+        self.thread_pool.start(worker)
+
+    def _on_decoded(self, request_id, key, image, on_loaded):
+        pixmap = QPixmap.fromImage(image)
+        self._cache[key] = pixmap
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+        if request_id == self._request_id:
+            on_loaded(pixmap)
+
+    def _on_failed(self, request_id, message, on_failed):
+        if request_id == self._request_id:
+            on_failed(message)
@@ -0,0 +1,93 @@
+import threading
+import time
+
+INTERACTIVE = "interactive"  # 用户操作：预览、搜索、验证、手动更换
+BACKGROUND = "background"  # 后台任务：预取、建立索引、补充照片池
+
+
+class RateLimiter:
+    """根据 X-Ratelimit-* 响应头跟踪剩余配额的令牌桶
+
+    令牌按 limit / window 的速度恢复，每次收到响应时以服务器返回的
+    剩余次数为准进行校正。配额中的 interactive_reserve 部分只留给用户操作，
+    后台请求在剩余配额低于这个保留值时会被延迟，等待超时后放弃。
+    """
+
+    def __init__(self, limit=50, window=3600, interactive_reserve=0.3):
+        self.limit = limit  # 每个窗口的请求数（收到响应头后更新）
+        self.window = window  # 配额窗口（秒），Unsplash按小时计算
+        self.interactive_reserve = interactive_reserve
+
+        self._tokens = float(limit)
+        self._updated = time.monotonic()
+        self._condition = threading.Condition()
+        self._stats = {INTERACTIVE: 0, BACKGROUND: 0, "rejected": 0}
+
+    def acquire(self, priority=INTERACTIVE, timeout=0):
+        """申请一次请求配额，成功返回True
+
+        用户操作只要还有配额就立即放行；后台请求必须保留用户操作的份额，
+        最多等待 timeout 秒。
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                self._refill()
+                floor = 0 if priority == INTERACTIVE else self._reserve()
+                if self._tokens - 1 >= floor:
+                    self._tokens -= 1
+                    self._stats[priority] += 1
+                    return True
+
+                remaining_wait = deadline - time.monotonic()
+                if remaining_wait <= 0:
+                    self._stats["rejected"] += 1
+                    return False
+
+                # 等待令牌恢复或响应头校正
+                needed = floor + 1 - self._tokens
+                refill_wait = needed * self.window / max(self.limit, 1)
+                self._condition.wait(min(remaining_wait, refill_wait))
+
+    def update_from_headers(self, headers):
+        """用响应头中的配额信息校正令牌数"""
+        limit = headers.get("X-Ratelimit-Limit")
+        remaining = headers.get("X-Ratelimit-Remaining")
+        if limit is None or remaining is None:
+            return
+
+        try:
+            limit = int(limit)
+            remaining = int(remaining)
+        except ValueError:
+            return
+
+        with self._condition:
+            self.limit = limit
+            self._tokens = float(remaining)
+            self._updated = time.monotonic()
+            self._condition.notify_all()
+
+    def status(self):
+        """获取当前配额状态（用于诊断）"""
+        with self._condition:
+            self._refill()
+            return {
+                "limit": self.limit,
+                "remaining": int(self._tokens),
+                "interactive_reserve": self._reserve(),
+                "interactive_requests": self._stats[INTERACTIVE],
+                "background_requests": self._stats[BACKGROUND],
+                "rejected": self._stats["rejected"],
+            }
+
+    def _reserve(self):
+        return self.limit * self.interactive_reserve
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(
+            float(self.limit), self._tokens + elapsed * self.limit / self.window
+        )
@@ -0,0 +1,144 @@
+import threading
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QGuiApplication
+
+
+def _fit(width, height, long_max, short_max):
+    """按比例缩小到长边不超过 long_max、短边不超过 short_max（不放大）"""
+    long_edge, short_edge = max(width, height), min(width, height)
+    scale = min(1, long_max / long_edge, short_max / short_edge)
+    return int(width * scale), int(height * scale)
+
+
+def build_resolution_levels(width, height):
+    """根据屏幕的物理像素生成各画质对应的下载尺寸
+
+    任何画质都不会超过屏幕实际能显示的像素，并保持屏幕的宽高比
+    （超宽屏按2:1裁剪）。"base" 为屏幕本身的物理分辨率。
+    """
+    base = (width, height)
+
+    ratio = width / height
+    if ratio >= 2:
+        width = int(height * 2)
+    elif ratio <= 0.5:
+        height = int(width * 2)
+
+    long_edge, short_edge = max(width, height), min(width, height)
+    if long_edge >= 3840 or short_edge >= 2160:
+        return {
+            "full": (width, height),
+            "high": _fit(width, height, 2560, 1440),
+            "medium": _fit(width, height, 1920, 1080),
+            "small": _fit(width, height, 1280, 720),
+            "base": base,
+        }
+    elif long_edge >= 2560 or short_edge >= 1440:
+        return {
+            "full": (width, height),
+            "high": (width, height),
+            "medium": _fit(width, height, 1920, 1080),
+            "small": _fit(width, height, 1280, 720),
+            "base": base,
+        }
+    else:
+        return {
+            "full": (width, height),
+            "high": (width, height),
+            "medium": (width * 2 // 3, height * 2 // 3),
+            "small": (width // 2, height // 2),
+            "base": base,
+        }
+
+
+DEFAULT_RESOLUTION_LEVELS = build_resolution_levels(1920, 1080)
+
+
+class ScreenInfo(QObject):
+    """缓存所有屏幕的物理分辨率（几何尺寸 x devicePixelRatio）
+
+    必须在GUI线程中创建；屏幕增减、分辨率或缩放变化时自动刷新，
+    其他线程只读取缓存的结果，不会访问Qt对象。
+    """
+
+    changed = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._screens = []
+        self._levels = dict(DEFAULT_RESOLUTION_LEVELS)
+
+        app = QGuiApplication.instance()
+        if app is not None:
+            app.screenAdded.connect(self._on_screen_added)
+            app.screenRemoved.connect(self.refresh)
+            app.primaryScreenChanged.connect(self.refresh)
+            for screen in app.screens():
+                self._watch(screen)
+
+        self.refresh()
+
+    def _watch(self, screen):
+        screen.geometryChanged.connect(self.refresh)
+        screen.logicalDotsPerInchChanged.connect(self.refresh)
+
+    def _on_screen_added(self, screen):
+        self._watch(screen)
+        self.refresh()
+
+    def refresh(self, *args):
+        """重新读取屏幕信息"""
+        app = QGuiApplication.instance()
+        if app is None:
+            return
+
+        primary = app.primaryScreen()
+        screens = []
+        for screen in app.screens():
+            geometry = screen.geometry()
+            ratio = screen.devicePixelRatio()
+            screens.append(
+                {
+                    "name": screen.name(),
+                    "x": geometry.x(),
+                    "y": geometry.y(),
+                    "width": geometry.width(),
+                    "height": geometry.height(),
+                    "device_pixel_ratio": ratio,
+                    "physical": (
+                        round(geometry.width() * ratio),
+                        round(geometry.height() * ratio),
+                    ),
+                    "primary": screen is primary,
+                }
+            )
+
+        if not screens:
+            return
+
+        main_screen = next((s for s in screens if s["primary"]), screens[0])
+        levels = build_resolution_levels(*main_screen["physical"])
+
+        with self._lock:
+            changed = screens != self._screens
+            self._screens = screens
+            self._levels = levels
+
+        if changed:
+            width, height = main_screen["physical"]
+            print(
+                f"屏幕: {len(screens)} 个，主屏幕物理分辨率 {width} x {height} "
+                f"(缩放 {main_screen['device_pixel_ratio']:g})"
+            )
+            self.changed.emit()
+
+    def resolution_levels(self):
+        """主屏幕各画质对应的下载尺寸（可在任意线程调用）"""
+        with self._lock:
+            return dict(self._levels)
+
+    def screens(self):
+        """所有屏幕的信息列表（可在任意线程调用）"""
+        with self._lock:
+            return [dict(screen) for screen in self._screens]
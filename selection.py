@@ -0,0 +1,96 @@
+import random
+import threading
+
+MASK64 = 0xFFFFFFFFFFFFFFFF
+
+
+class PermutationCursor:
+    """[0, size) 上的伪随机排列
+
+    使用 Feistel 网络在不小于 size 的 2^k 区间上构造双射，超出 size 的值
+    继续映射（cycle walking），因此不需要生成和保存整个排列，
+    只需 (seed, position) 即可得到第 position 个元素。
+    """
+
+    ROUNDS = 4
+
+    def __init__(self, size, seed):
+        self.size = size
+        self.seed = seed
+
+        bits = max(2, (size - 1).bit_length())
+        bits += bits % 2  # 左右两半等长
+        self._half_bits = bits // 2
+        self._half_mask = (1 << self._half_bits) - 1
+
+        rng = random.Random(seed)
+        self._keys = [rng.getrandbits(64) for _ in range(self.ROUNDS)]
+
+    def at(self, position):
+        """排列中第 position 个元素"""
+        value = position
+        while True:
+            value = self._permute(value)
+            if value < self.size:
+                return value
+
+    def _permute(self, value):
+        left = value >> self._half_bits
+        right = value & self._half_mask
+        for key in self._keys:
+            left, right = right, left ^ self._round(right, key)
+        return (left << self._half_bits) | right
+
+    def _round(self, value, key):
+        mixed = ((value ^ key) * 0x9E3779B97F4A7C15) & MASK64
+        mixed ^= mixed >> 32
+        return mixed & self._half_mask
+
+
+class PhotoSelector:
+    """按来源记录选择进度，保证一轮用完之前不会重复
+
+    每个来源只保存 (seed, position, size) 三个整数，与照片数量无关；
+    一轮结束后换一个新的种子开始下一轮。照片数量变化时当前一轮
+    仍按原来的数量进行（越界的位置被跳过），新的数量从下一轮开始生效。
+    """
+
+    def __init__(self, cache_store):
+        self.cache_store = cache_store
+        self._lock = threading.Lock()
+
+    def next_index(self, source_key, size):
+        """返回来源中下一张照片的位置，size 为当前照片总数"""
+        if size <= 0:
+            return None
+
+        with self._lock:
+            state = self.cache_store.get_selection_state(source_key)
+            if state:
+                seed, position, cycle_size = state
+                cursor = PermutationCursor(cycle_size, seed)
+                while position < cycle_size:
+                    index = cursor.at(position)
+                    position += 1
+                    if index < size:
+                        self.cache_store.save_selection_state(
+                            source_key, seed, position, cycle_size
+                        )
+                        return index
+
+            # 开始新的一轮，避免新一轮的第一张与上一轮最后一张相同
+            last = cursor.at(cycle_size - 1) if state else None
+            seed = random.getrandbits(32)
+            cursor = PermutationCursor(size, seed)
+            while size > 1 and cursor.at(0) == last:
+                seed = random.getrandbits(32)
+                cursor = PermutationCursor(size, seed)
+            if state:
+                print(f"已轮换完一遍，重新开始: {source_key}")
+
+            self.cache_store.save_selection_state(source_key, seed, 1, size)
+            return cursor.at(0)
+
+    def reset(self, source_key):
+        """清除来源的选择记录"""
+        self.cache_store.remove_selection_state(source_key)
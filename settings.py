@@ -1,5 +1,8 @@
 import os
 import json
+import atexit
+import threading
+from contextlib import contextmanager
 
 class Settings:
     def __init__(self, config_file="config.json"):
@@ -17,8 +20,45 @@ class Settings:
             "selected_collection": "",  # 选中的合集ID
             "collection_mode": "popular",  # 合集模式 (popular 或 search)
             "last_collection_search": "",  # 上次搜索的合集关键词
-            "custom_collections": {}  # 用户自定义添加的合集 {name: id}
+            "custom_collections": {},  # 用户自定义添加的合集 {name: id}
+            "prefetch_size": 3,  # 每个壁纸来源预先下载的图片数量
+            "http_pool_size": 8,  # 每个主机保持的HTTP连接数
+            "http_connect_timeout": 5,  # 建立连接超时（秒）
+            "http_timeout": 10,  # API请求读取超时（秒）
+            "download_timeout": 60,  # 图片下载读取超时（秒）
+            "image_cache_max_mb": 500,  # 图片缓存容量上限（MB）
+            "image_cache_max_entries": 200,  # 图片缓存数量上限
+            "thumbnail_cache_max_mb": 50,  # 缩略图缓存容量上限（MB）
+            "index_max_pages": 20,  # 建立合集索引时最多请求的页数
+            "index_concurrency": 4,  # 建立合集索引时的并发请求数
+            "import_concurrency": 4,  # 批量导入合集时的并发验证数
+            "random_batch_size": 30,  # 随机模式每次请求获取的照片数量（最多30）
+            "random_pool_low_water": 5,  # 随机照片池低于此数量时在后台补充
+            "rate_limit_per_hour": 50,  # 每小时API请求配额（收到响应头后以服务器为准）
+            "interactive_reserve": 0.3,  # 只留给用户操作的配额比例，后台任务不会占用
+            "background_max_wait": 30,  # 配额不足时后台请求最多等待的秒数，超时放弃
+            "http_max_retries": 3,  # 临时错误（连接失败、超时、5xx、429）的最大重试次数
+            "circuit_failure_threshold": 5,  # 同一接口连续失败多少次后暂停请求
+            "circuit_reset_timeout": 60,  # 接口暂停请求的时间（秒）
+            "change_retry_delay": 60,  # 更换失败后第一次提前重试的等待时间（秒），之后逐次翻倍
+            "change_retry_max_delay": 1800,  # 提前重试的最长等待时间（秒）
+            "offline_rotation": True,  # 网络不可用时从本地已下载的图片中轮换
+            "connectivity_probe_interval": 60,  # 离线时检测网络是否恢复的间隔（秒）
+            "multi_monitor_mode": "single",  # 多屏幕模式 (single: 所有屏幕同一张, per_screen: 每个屏幕单独一张)
+            "windows_style_before_span": None,  # 开启跨区壁纸前的Windows壁纸样式 [WallpaperStyle, TileWallpaper]
+            "adaptive_quality": True,  # 按网速自动降低画质（quality 为画质上限）
+            "download_time_budget": 15,  # 一张壁纸预计下载时间的上限（秒）
+            "progressive_apply": True  # 没有预取的壁纸时先应用小尺寸版本，完整尺寸下载后替换
         }
+
+        # 写入合并：修改只更新内存，由后台定时器在 flush_interval 内最多写一次文件
+        self.flush_interval = 1.0  # 秒
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._batch_depth = 0
+        self._flush_timer = None
+        atexit.register(self.flush)
+
         self.settings = self.load_settings()
         
         # 确保所有默认设置都存在（用于版本升级兼容性）
@@ -34,7 +74,7 @@ class Settings:
                 print(f"添加新设置: {key} = {value}")
         
         if updated:
-            self.save_settings()
+            self._mark_dirty()
     
     def load_settings(self):
         """加载设置，如果文件不存在则创建默认设置"""
@@ -58,62 +98,123 @@ class Settings:
             return default_copy
     
     def save_settings(self, settings=None):
-        """保存设置"""
-        if settings is None:
-            settings = self.settings
-        
+        """立即保存设置（先写临时文件再替换，避免写入中断导致配置损坏）"""
+        with self._lock:
+            if settings is None:
+                settings = self.settings
+                self._dirty = False
+
+            try:
+                # 确保目录存在
+                config_dir = os.path.dirname(os.path.abspath(self.config_file))
+                if config_dir and not os.path.exists(config_dir):
+                    os.makedirs(config_dir, exist_ok=True)
+
+                temp_file = self.config_file + ".tmp"
+                with open(temp_file, "w", encoding="utf-8") as f:
+                    json.dump(settings, f, ensure_ascii=False, indent=4)
+                os.replace(temp_file, self.config_file)
+                print(f"设置已保存到: {self.config_file}")
+
+            except Exception as e:
+                print(f"保存设置失败: {e}")
+
+    def flush(self):
+        """把尚未写入的修改立即保存到文件"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._dirty:
+                self.save_settings()
+
+    @contextmanager
+    def batch(self):
+        """批量修改设置，期间的所有修改在结束后合并为一次写入
+
+        用法:
+            with settings.batch():
+                settings.set_setting(...)
+                settings.add_custom_collection(...)
+        """
+        with self._lock:
+            self._batch_depth += 1
         try:
-            # 确保目录存在
-            config_dir = os.path.dirname(os.path.abspath(self.config_file))
-            if config_dir and not os.path.exists(config_dir):
-                os.makedirs(config_dir, exist_ok=True)
-            
-            with open(self.config_file, "w", encoding="utf-8") as f:
-                json.dump(settings, f, ensure_ascii=False, indent=4)
-            print(f"设置已保存到: {self.config_file}")
-            
-        except Exception as e:
-            print(f"保存设置失败: {e}")
-    
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._dirty:
+                    self._schedule_flush()
+
+    def _mark_dirty(self):
+        """标记有未保存的修改，并安排延迟写入"""
+        with self._lock:
+            self._dirty = True
+            if self._batch_depth == 0:
+                self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_timer is not None:
+            return
+        self._flush_timer = threading.Timer(self.flush_interval, self._on_flush_timer)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+
+    def _on_flush_timer(self):
+        with self._lock:
+            self._flush_timer = None
+            if self._dirty and self._batch_depth == 0:
+                self.save_settings()
+
     def get_setting(self, key, default=None):
-        """获取设置值，如果不存在则返回默认值"""
+        """获取设置值，如果不存在则返回默认值（读取不会触发写入）"""
         if key in self.settings:
             return self.settings[key]
         elif key in self.default_settings:
-            # 如果设置中没有但默认设置中有，添加到设置中
-            self.settings[key] = self.default_settings[key]
-            self.save_settings()
             return self.default_settings[key]
         else:
             return default
     
     def set_setting(self, key, value):
-        """设置值"""
-        self.settings[key] = value
-        self.save_settings()
+        """设置值（内存立即生效，文件延迟写入）"""
+        with self._lock:
+            self.settings[key] = value
+            self._mark_dirty()
         print(f"设置已更新: {key} = {value}")
     
+    def remove_setting(self, key):
+        """删除设置项"""
+        with self._lock:
+            if key in self.settings:
+                del self.settings[key]
+                self._mark_dirty()
+                print(f"设置已删除: {key}")
+
     def reset_to_default(self):
         """重置为默认设置"""
-        self.settings = self.default_settings.copy()
-        self.save_settings()
+        with self._lock:
+            self.settings = self.default_settings.copy()
+            self._mark_dirty()
         print("设置已重置为默认值")
     
     def add_custom_collection(self, name, collection_id):
         """添加自定义合集"""
-        custom_collections = self.get_setting("custom_collections", {})
-        custom_collections[name] = collection_id
-        self.set_setting("custom_collections", custom_collections)
+        with self._lock:
+            custom_collections = dict(self.get_setting("custom_collections", {}))
+            custom_collections[name] = collection_id
+            self.set_setting("custom_collections", custom_collections)
         print(f"添加自定义合集: {name} (ID: {collection_id})")
     
     def remove_custom_collection(self, name):
         """移除自定义合集"""
-        custom_collections = self.get_setting("custom_collections", {})
-        if name in custom_collections:
-            del custom_collections[name]
-            self.set_setting("custom_collections", custom_collections)
-            print(f"移除自定义合集: {name}")
-            return True
+        with self._lock:
+            custom_collections = dict(self.get_setting("custom_collections", {}))
+            if name in custom_collections:
+                del custom_collections[name]
+                self.set_setting("custom_collections", custom_collections)
+                print(f"移除自定义合集: {name}")
+                return True
         return False
     
     def get_custom_collections(self):
@@ -138,11 +239,11 @@ class Settings:
                 imported_settings = json.load(f)
             
             # 验证导入的设置
-            for key in imported_settings:
-                if key in self.default_settings:
-                    self.settings[key] = imported_settings[key]
-            
-            self.save_settings()
+            with self._lock:
+                for key in imported_settings:
+                    if key in self.default_settings:
+                        self.settings[key] = imported_settings[key]
+                self._mark_dirty()
             print(f"设置已从 {import_path} 导入")
             return True
         except Exception as e:
@@ -151,7 +252,8 @@ class Settings:
     
     def get_all_settings(self):
         """获取所有设置"""
-        return self.settings.copy()
+        with self._lock:
+            return self.settings.copy()
     
     def print_current_settings(self):
         """打印当前所有设置（用于调试）"""
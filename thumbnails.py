@@ -0,0 +1,70 @@
+import hashlib
+from collections import OrderedDict
+from PyQt5.QtCore import QObject, QThreadPool
+from PyQt5.QtGui import QPixmap
+from workers import Worker
+from preview import decode_scaled
+
+
+class ThumbnailLoader(QObject):
+    """异步加载缩略图（合集封面、搜索结果预览）
+
+    下载的图片保存在磁盘缓存中，解码后的 QPixmap 按 (URL, 尺寸) 保存在
+    内存LRU中，再次浏览时直接显示。同一张缩略图同时只会加载一次。
+    """
+
+    def __init__(self, http, disk_cache, max_entries=100, max_threads=4):
+        super().__init__()
+        self.http = http
+        self.disk_cache = disk_cache
+        self.max_entries = max_entries
+        self._memory = OrderedDict()  # {(URL, 宽, 高): QPixmap}
+        self._pending = {}  # {(URL, 宽, 高): [回调]}
+
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(max_threads)
+
+    def load(self, url, width, height, on_loaded):
+        """加载缩略图，完成后在GUI线程中调用 on_loaded(QPixmap)；内存命中时立即调用"""
+        if not url:
+            return
+
+        key = (url, width, height)
+        pixmap = self._memory.get(key)
+        if pixmap is not None:
+            self._memory.move_to_end(key)
+            on_loaded(pixmap)
+            return
+
+        if key in self._pending:
+            self._pending[key].append(on_loaded)
+            return
+        self._pending[key] = [on_loaded]
+
+        worker = Worker(self._fetch, url, width, height)
+        worker.signals.result.connect(lambda image: self._on_fetched(key, image))
+        worker.signals.error.connect(lambda message: self._on_failed(key, message))
+        self.thread_pool.start(worker)
+
+    def _fetch(self, url, width, height):
+        """在后台线程中读取磁盘缓存（没有时下载），再按尺寸解码"""
+        disk_key = hashlib.sha1(url.encode("utf-8")).hexdigest()[:20]
+        path = self.disk_cache.get(disk_key)
+        if not path:
+            path = self.disk_cache.path_for(disk_key)
+            self.http.download_to_file(url, path)
+            self.disk_cache.put(disk_key)
+        return decode_scaled(path, width, height)
+
+    def _on_fetched(self, key, image):
+        pixmap = QPixmap.fromImage(image)
+        self._memory[key] = pixmap
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+        for on_loaded in self._pending.pop(key, []):
+            on_loaded(pixmap)
+
+    def _on_failed(self, key, message):
+        self._pending.pop(key, None)
+        print(f"加载缩略图失败: {message}")
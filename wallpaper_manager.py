@@ -3,23 +3,114 @@ import ctypes
 import requests
 import platform
 import json
-from PyQt5.QtCore import QTimer, QObject, pyqtSignal
+from PyQt5.QtCore import QTimer, QObject, QThreadPool, pyqtSignal
 import time
 import random
 from datetime import datetime
 import tempfile
+import math
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from prefetch_queue import PrefetchQueue
+from workers import Worker
+from http_client import HttpClient, RateLimitExceeded
+from rate_limiter import RateLimiter
+from image_cache import ImageCache
+from cache_store import CacheStore, compact_photo
+from offline_rotation import OfflineRotation
+from selection import PhotoSelector
+from screens import ScreenInfo, build_resolution_levels
+import multi_monitor
+import image_processing
+from bandwidth import BandwidthEstimator
 
 
 class WallpaperManager(QObject):
     wallpaper_changed = pyqtSignal(str)
     error_occurred = pyqtSignal(str)
 
+    # 画质从低到高
+    QUALITY_LEVELS = ["small", "medium", "high", "full"]
+
+    # API响应缓存有效期（秒），过期后用 ETag / Last-Modified 重新验证
+    HTTP_CACHE_POLICY = [
+        (r"^/collections/[^/]+$", 24 * 3600),  # 合集信息
+        (r"^/collections/[^/]+/photos$", 24 * 3600),  # 合集照片分页
+        (r"^/users/[^/]+$", 3600),  # 用户信息
+        (r"^/users/[^/]+/likes$", 3600),  # 用户likes分页
+        (r"^/search/collections$", 600),  # 合集搜索
+    ]
+
     def __init__(self, settings):
         super().__init__()
         self.settings = settings
         self.timer = QTimer()
         self.timer.timeout.connect(self.change_wallpaper)
         self.current_wallpaper = ""
+        self._screen_wallpapers = []  # 多屏幕模式下各屏幕正在使用的图片
+        self.last_change_info = None  # 最近一次更换的来源、画质和尺寸（用于诊断）
+        self._change_generation = 0  # 每次更换加1，用于判断完整尺寸是否还需要替换
+        self._pending_upgrades = {}  # {预览图路径: 待下载的完整尺寸}，由 _download_info_lock 保护
+        self._download_info = {}  # {图片路径: 下载时选择的画质和尺寸}
+        self._download_info_lock = threading.Lock()
+        self._changing = False  # 是否有正在进行的壁纸更换
+
+        # 屏幕分辨率在GUI线程中检测并缓存，屏幕变化时自动更新
+        self.screen_info = ScreenInfo()
+
+        # 更换失败后提前重试，不必等待一整个更换周期
+        self.retry_timer = QTimer()
+        self.retry_timer.setSingleShot(True)
+        self.retry_timer.timeout.connect(self.change_wallpaper)
+        self._change_retries = 0  # 连续失败的次数
+
+        # 离线状态：网络不可用时轮换本地图片，并定时检测网络是否恢复
+        self._offline = False
+        self.connectivity_timer = QTimer()
+        self.connectivity_timer.timeout.connect(self.check_connectivity)
+
+        # 所有网络和磁盘操作都在线程池中执行，避免阻塞GUI线程
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(4)
+
+        # 后台任务（预取、建立索引、补充照片池）使用独立的线程池：
+        # 配额紧张时它们会在限流器中等待，不能占用用户操作的线程
+        self.background_pool = QThreadPool()
+        self.background_pool.setMaxThreadCount(2)
+
+        # 缓存数据库（合集缓存和API响应缓存），保存在配置文件旁
+        config_dir = os.path.dirname(os.path.abspath(self.settings.config_file))
+        self.cache_store = CacheStore(os.path.join(config_dir, "cache.db"))
+
+        # 按来源记录选图进度，一轮用完之前不重复
+        self.selector = PhotoSelector(self.cache_store)
+
+        # API请求配额：用户操作和后台任务分配不同的份额
+        self.rate_limiter = RateLimiter(
+            limit=self.settings.get_setting("rate_limit_per_hour", 50),
+            interactive_reserve=self.settings.get_setting("interactive_reserve", 0.3),
+        )
+
+        # 根据实际下载速度选择画质
+        self.bandwidth = BandwidthEstimator()
+
+        # 共享的HTTP客户端（连接池 + keep-alive + 响应缓存 + 配额调度 + 重试熔断）
+        self.http = HttpClient(
+            pool_size=self.settings.get_setting("http_pool_size", 8),
+            timeout=self.settings.get_setting("http_timeout", 10),
+            download_timeout=self.settings.get_setting("download_timeout", 60),
+            connect_timeout=self.settings.get_setting("http_connect_timeout", 5),
+            max_retries=self.settings.get_setting("http_max_retries", 3),
+            failure_threshold=self.settings.get_setting("circuit_failure_threshold", 5),
+            reset_timeout=self.settings.get_setting("circuit_reset_timeout", 60),
+            cache_store=self.cache_store,
+            cache_policy=self.HTTP_CACHE_POLICY,
+            rate_limiter=self.rate_limiter,
+            background_max_wait=self.settings.get_setting("background_max_wait", 30),
+            bandwidth_estimator=self.bandwidth,
+        )
 
         self.unsplash_access_key = self.settings.get_setting("unsplash_access_key", "")
         self.unsplash_secret_key = self.settings.get_setting("unsplash_secret_key", "")
@@ -28,9 +119,51 @@ class WallpaperManager(QObject):
         self.wallpaper_dir = os.path.join(tempfile.gettempdir(), "wallpaper_changer")
         os.makedirs(self.wallpaper_dir, exist_ok=True)
 
+        # 按照片ID和尺寸缓存已下载的图片
+        self.image_cache = ImageCache(
+            os.path.join(self.wallpaper_dir, "cache"),
+            max_bytes=self.settings.get_setting("image_cache_max_mb", 500) * 1024 * 1024,
+            max_entries=self.settings.get_setting("image_cache_max_entries", 200),
+        )
+
+        # 合集封面、搜索结果等缩略图的磁盘缓存
+        self.thumbnail_cache = ImageCache(
+            os.path.join(self.wallpaper_dir, "thumbnails"),
+            max_bytes=self.settings.get_setting("thumbnail_cache_max_mb", 50) * 1024 * 1024,
+            max_entries=1000,
+        )
+
         # 只为已添加的自定义合集创建缓存
+        # 持久化部分保存在缓存数据库中，内存中只保留用到的合集
         self.collection_info_cache = {}  # 合集信息缓存
-        self.collection_photos_cache = {}  # 合集照片缓存
+        self.collection_index_cache = {}  # 合集照片索引 {合集ID: (照片列表, 是否完整)}
+        self._indexing = set()  # 正在建立索引的合集
+        self._index_backoff = {}  # 建立索引失败的合集 {合集ID: (连续失败次数, 可重试时间)}
+        self._index_lock = threading.Lock()
+        self._listing_totals = {}  # {合集ID: (照片总数, 获取时间)}，用于直接定位分页
+
+        # 随机/关键词模式的照片池：一次请求多张，按需取用
+        self._random_pools = {}  # {关键词: deque[照片]}
+        self._random_refilling = set()
+        self._random_pool_lock = threading.Lock()
+        # 补充完成时通知等待中的取用者，照片池为空时不会重复请求
+        self._random_pool_refilled = threading.Condition(self._random_pool_lock)
+
+        # 离线轮换：已下载的壁纸、图片缓存和收藏目录
+        self.offline_rotation = OfflineRotation(
+            lambda: [
+                self.wallpaper_dir,
+                self.image_cache.directory,
+                self.settings.get_setting("favorite_path", ""),
+            ],
+            accept=self._is_offline_candidate,
+        )
+
+        # 预取队列：按来源保存已下载好的壁纸，更换时直接应用
+        self.prefetch_queue = PrefetchQueue(
+            self.run_in_background, self.settings.get_setting("prefetch_size", 3)
+        )
+        self._prefetch_source_key = None  # 当前预取的来源，切换来源时清空旧队列
 
         # 预定义的热门合集
         self.popular_collections = {
@@ -56,32 +189,78 @@ class WallpaperManager(QObject):
         if not self.unsplash_access_key:
             print("未设置Unsplash API密钥")
 
+    def run_async(
+        self, fn, *args, on_result=None, on_error=None, on_progress=None, **kwargs
+    ):
+        """在线程池中执行耗时操作，结果回调在GUI线程中执行
+
+        指定 on_progress 时会向 fn 传入 progress 参数，fn 调用 progress(部分结果)
+        后 on_progress 在GUI线程中收到该结果。
+        """
+        worker = Worker(fn, *args, **kwargs)
+        if on_progress:
+            worker.kwargs["progress"] = worker.signals.progress.emit
+            worker.signals.progress.connect(on_progress)
+        if on_result:
+            worker.signals.result.connect(on_result)
+        if on_error:
+            worker.signals.error.connect(on_error)
+        self.thread_pool.start(worker)
+        return worker
+
+    def run_in_background(self, fn, *args, on_result=None, on_error=None, **kwargs):
+        """在后台线程池中执行后台任务，任务中的请求按后台优先级调度"""
+
+        def task():
+            with self.http.background():
+                return fn(*args, **kwargs)
+
+        worker = Worker(task)
+        if on_result:
+            worker.signals.result.connect(on_result)
+        if on_error:
+            worker.signals.error.connect(on_error)
+        self.background_pool.start(worker)
+        return worker
+
     def load_cached_collections(self):
-        """加载已缓存的合集信息"""
+        """清理过期的合集缓存（缓存内容在使用时按合集ID读取）"""
         try:
-            cached_data = self.settings.get_setting("cached_collections", {})
-            current_time = time.time()
+            self._migrate_settings_cache()
 
             # 清理过期缓存（7天）
-            valid_cache = {}
-            for collection_id, data in cached_data.items():
-                if current_time - data.get("cached_time", 0) < 7 * 24 * 3600:
-                    valid_cache[collection_id] = data
-                    # 加载到内存缓存
-                    self.collection_info_cache[collection_id] = data["info"]
-                    if "photos" in data:
-                        self.collection_photos_cache[collection_id] = data["photos"]
-
-            # 保存清理后的缓存
-            if len(valid_cache) != len(cached_data):
-                self.settings.set_setting("cached_collections", valid_cache)
-                print(f"清理过期缓存，保留 {len(valid_cache)} 个合集")
-
-            print(f"加载了 {len(valid_cache)} 个已缓存的合集")
+            remaining = self.cache_store.purge_expired(7 * 24 * 3600)
+            print(f"已缓存 {remaining} 个合集")
 
         except Exception as e:
             print(f"加载缓存失败: {e}")
 
+    def _migrate_settings_cache(self):
+        """把旧版本保存在 config.json 中的合集缓存迁移到缓存数据库"""
+        cached_data = self.settings.get_setting("cached_collections")
+        if cached_data is None:
+            return
+
+        for collection_id, data in cached_data.items():
+            cached_time = data.get("cached_time", 0)
+            self.cache_store.save_collection_info(
+                collection_id, data["info"], cached_time
+            )
+
+        self.settings.remove_setting("cached_collections")
+        print(f"已将 {len(cached_data)} 个合集缓存迁移到 {self.cache_store.db_path}")
+
+    def _get_cached_collection_info(self, collection_id):
+        """从内存或缓存数据库中读取合集信息"""
+        if collection_id in self.collection_info_cache:
+            return self.collection_info_cache[collection_id]
+
+        cached = self.cache_store.get_collection_info(collection_id)
+        if cached:
+            self.collection_info_cache[collection_id] = cached[0]
+            return cached[0]
+        return None
+
     def get_collection_info(self, collection_id, cache_if_added=False):
         """获取合集详细信息（支持用户likes）"""
         # 检查是否是用户likes
@@ -89,9 +268,11 @@ class WallpaperManager(QObject):
             username = self.get_username_from_collection_id(collection_id)
             if username:
                 # 如果有缓存且要求使用缓存
-                if cache_if_added and collection_id in self.collection_info_cache:
-                    print(f"从缓存获取用户likes信息: {username}")
-                    return self.collection_info_cache[collection_id]
+                if cache_if_added:
+                    cached_info = self._get_cached_collection_info(collection_id)
+                    if cached_info:
+                        print(f"从缓存获取用户likes信息: {username}")
+                        return cached_info
 
                 # 获取用户likes信息
                 user_likes_info = self.get_user_likes_as_collection_info(username)
@@ -105,9 +286,11 @@ class WallpaperManager(QObject):
                 return user_likes_info
 
         # 原有的合集处理逻辑
-        if cache_if_added and collection_id in self.collection_info_cache:
-            print(f"从缓存获取合集信息: {collection_id}")
-            return self.collection_info_cache[collection_id]
+        if cache_if_added:
+            cached_info = self._get_cached_collection_info(collection_id)
+            if cached_info:
+                print(f"从缓存获取合集信息: {collection_id}")
+                return cached_info
 
         if not self.unsplash_access_key:
             print("错误: 未设置Unsplash API密钥")
@@ -119,10 +302,7 @@ class WallpaperManager(QObject):
 
             print(f"请求合集信息 (缓存模式: {cache_if_added}): {collection_id}")
 
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-
-            collection_info = response.json()
+            collection_info = self.http.get_json(url, params=params)
 
             # 检查返回的数据结构
             if not isinstance(collection_info, dict) or "id" not in collection_info:
@@ -168,55 +348,232 @@ class WallpaperManager(QObject):
             else:
                 print(f"HTTP错误: {e}")
             return None
+        except RateLimitExceeded as e:
+            print(e)
+            return None
         except Exception as e:
             print(f"获取合集信息时发生错误: {e}")
             return None
 
-    def get_collection_photos(self, collection_id, per_page=30):
-        """获取合集中的照片列表（支持用户likes）"""
-        # 检查是否是用户likes
+    def validate_collection_source(self, collection_id, progress=None):
+        """验证合集或用户likes是否可用，返回合集信息，验证失败时返回None
+
+        信息和第一页照片（只用于确认可以获取照片）同时请求，每收到一个就调用
+        progress((名称, 结果))，名称为 "info" 或 "photos"。
+        """
         if self.is_user_likes_collection(collection_id):
             username = self.get_username_from_collection_id(collection_id)
-            if username:
-                return self.get_user_likes(username, per_page)
-            return []
-        # 检查缓存
-        if collection_id in self.collection_photos_cache:
-            cached_photos, timestamp = self.collection_photos_cache[collection_id]
-            # 缓存1小时内有效
-            if time.time() - timestamp < 3600:
-                print(f"从缓存获取照片列表: {collection_id}")
-                return cached_photos
-
-        if not self.unsplash_access_key:
-            return []
+            results = self._fan_out(
+                {
+                    "info": lambda: self.get_user_likes_as_collection_info(username),
+                    "photos": lambda: self.get_user_likes(username, per_page=1),
+                },
+                progress,
+            )
+        else:
+            results = self._fan_out(
+                {
+                    "info": lambda: self.get_collection_info(collection_id),
+                    "photos": lambda: self._fetch_collection_page(
+                        collection_id, 1, per_page=1
+                    ),
+                },
+                progress,
+            )
 
-        try:
-            url = f"https://api.unsplash.com/collections/{collection_id}/photos"
-            params = {
-                "client_id": self.unsplash_access_key,
-                "per_page": per_page,
-                "page": random.randint(1, 3),  # 随机选择页面
+        if not results["photos"]:
+            # 信息正常但取不到照片（如likes不公开）同样无法使用
+            return None
+        return results["info"]
+
+    def cache_validated_collection(self, collection_id, collection_info):
+        """缓存添加合集时已经验证过的信息，不再重新请求"""
+        self.collection_info_cache[collection_id] = collection_info
+        self.save_collection_to_cache(collection_id, collection_info)
+        print(f"已缓存合集信息: {collection_id}")
+
+    def _fan_out(self, tasks, progress=None):
+        """并发执行相互独立的请求，tasks 为 {名称: 无参函数}，返回 {名称: 结果}
+
+        请求失败时结果为None；每完成一个就调用 progress((名称, 结果))。
+        """
+        results = {}
+        with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+            futures = {
+                executor.submit(self.http.wrap_current_priority(fn)): name
+                for name, fn in tasks.items()
             }
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    print(f"请求失败 ({name}): {e}")
+                    results[name] = None
+                if progress:
+                    progress((name, results[name]))
+        return results
+
+    def _fetch_collection_page(self, collection_id, page, per_page=30):
+        """请求合集的一页照片，返回精简后的照片列表（失败时抛出异常）"""
+        url = f"https://api.unsplash.com/collections/{collection_id}/photos"
+        params = {
+            "client_id": self.unsplash_access_key,
+            "per_page": per_page,
+            "page": page,
+        }
 
-            print(f"请求合集照片: {collection_id}")
+        photos = self.http.get_json(url, params=params)
+        return [compact_photo(photo) for photo in photos]
 
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
+    def get_collection_index(self, collection_id):
+        """获取合集的照片索引，返回 (照片列表, 是否完整)，尚未建立索引时返回None"""
+        if collection_id in self.collection_index_cache:
+            return self.collection_index_cache[collection_id]
 
-            photos = response.json()
+        cached = self.cache_store.get_collection_index(collection_id)
+        if not cached:
+            return None
 
-            # 缓存结果（只缓存已添加的合集）
-            if self.is_collection_added(collection_id):
-                self.collection_photos_cache[collection_id] = (photos, time.time())
-                self.update_collection_photos_cache(collection_id, photos)
-                print(f"已缓存照片列表: {collection_id}")
+        photos, complete, indexed_time = cached
+        self.collection_index_cache[collection_id] = (photos, complete)
 
-            return photos
+        # 索引超过7天后在后台重建，期间继续使用旧索引
+        if time.time() - indexed_time > 7 * 24 * 3600:
+            self.schedule_collection_index(collection_id)
+        return photos, complete
 
-        except Exception as e:
-            print(f"获取合集照片失败: {e}")
-            return []
+    def schedule_collection_index(self, collection_id):
+        """在后台为已添加的合集建立照片索引（同一合集只会有一个任务）"""
+        if self.is_user_likes_collection(collection_id):
+            return
+        if not self.is_collection_added(collection_id):
+            return
+
+        with self._index_lock:
+            if collection_id in self._indexing:
+                return
+            # 上次失败或被中断，等待退避时间后再重试
+            backoff = self._index_backoff.get(collection_id)
+            if backoff and time.time() < backoff[1]:
+                return
+            self._indexing.add(collection_id)
+
+        def task():
+            try:
+                self.index_collection(collection_id)
+            finally:
+                with self._index_lock:
+                    self._indexing.discard(collection_id)
+
+        self.run_in_background(task)
+
+    def index_collection(self, collection_id, per_page=30):
+        """并发获取合集的所有分页，建立完整的照片索引
+
+        并发数由 index_concurrency 控制。页数超过 index_max_pages 的合集不建立
+        索引（不完整的索引不会被使用），直接按照片总数抽取。
+        遇到速率限制（403/429）时立即停止剩余请求。返回索引的照片数量。
+        """
+        info = self.get_collection_info(collection_id, cache_if_added=True)
+        if not info:
+            print(f"无法建立合集索引，获取合集信息失败: {collection_id}")
+            self._record_index_failure(collection_id)
+            return 0
+
+        total_photos = info.get("total_photos", 0)
+        total_pages = math.ceil(total_photos / per_page)
+        if total_pages == 0:
+            return 0
+
+        if not self._is_indexable(total_photos, per_page):
+            # 合集太大，不消耗请求配额建立索引；同时删除旧版本留下的部分索引
+            print(f"合集页数超过上限，不建立索引: {collection_id} ({total_pages} 页)")
+            self.collection_index_cache.pop(collection_id, None)
+            self.cache_store.remove_collection_index(collection_id)
+            return 0
+
+        pages = list(range(1, total_pages + 1))
+        interrupted = False  # 有分页请求失败或被速率限制中断
+
+        print(f"开始建立合集索引: {collection_id} ({total_pages} 页)")
+
+        stop_event = threading.Event()
+
+        def fetch(page):
+            if stop_event.is_set():
+                return page, None
+            try:
+                return page, self._fetch_collection_page(collection_id, page, per_page)
+            except RateLimitExceeded:
+                print("API请求配额不足，停止建立索引")
+                stop_event.set()
+                raise
+            except requests.exceptions.HTTPError as e:
+                if e.response is not None and e.response.status_code in (403, 429):
+                    print("请求受到速率限制，停止建立索引")
+                    stop_event.set()
+                raise
+
+        results = {}
+        workers = self.settings.get_setting("index_concurrency", 4)
+        # 分页在线程池中请求，沿用调用方线程的请求优先级
+        fetch = self.http.wrap_current_priority(fetch)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(fetch, page) for page in pages]
+            for future in as_completed(futures):
+                try:
+                    page, photos = future.result()
+                except Exception as e:
+                    print(f"获取合集分页失败: {e}")
+                    interrupted = True
+                    continue
+                if photos is None:
+                    interrupted = True
+                    continue
+                results[page] = photos
+
+        if not results:
+            print(f"合集索引建立失败: {collection_id}")
+            self._record_index_failure(collection_id)
+            return 0
+
+        complete = not interrupted
+        if interrupted:
+            self._record_index_failure(collection_id)
+        else:
+            with self._index_lock:
+                self._index_backoff.pop(collection_id, None)
+
+        # 按页码顺序合并并去重
+        photos = []
+        seen_ids = set()
+        for page in sorted(results):
+            for photo in results[page]:
+                if photo["id"] not in seen_ids:
+                    seen_ids.add(photo["id"])
+                    photos.append(photo)
+
+        self.cache_store.save_collection_index(collection_id, photos, complete)
+        self.collection_index_cache[collection_id] = (photos, complete)
+        print(
+            f"合集索引建立完成: {collection_id}, 共 {len(photos)} 张照片"
+            f"{'' if complete else '（部分）'}"
+        )
+        return len(photos)
+
+    def _is_indexable(self, total_photos, per_page=30):
+        """合集页数不超过 index_max_pages 时才建立索引"""
+        max_pages = self.settings.get_setting("index_max_pages", 20)
+        return 0 < math.ceil(total_photos / per_page) <= max_pages
+
+    def _record_index_failure(self, collection_id):
+        """记录建立索引失败，重试间隔从1小时开始翻倍，最长1天"""
+        with self._index_lock:
+            failures = self._index_backoff.get(collection_id, (0, 0))[0] + 1
+            delay = min(3600 * 2 ** (failures - 1), 24 * 3600)
+            self._index_backoff[collection_id] = (failures, time.time() + delay)
+        print(f"合集索引未完成，{delay // 60} 分钟后重试: {collection_id}")
 
     def is_collection_added(self, collection_id):
         """检查合集是否已添加到自定义合集中（支持用户likes）"""
@@ -226,38 +583,23 @@ class WallpaperManager(QObject):
     def save_collection_to_cache(self, collection_id, collection_info):
         """保存合集信息到持久化缓存"""
         try:
-            cached_data = self.settings.get_setting("cached_collections", {})
-            cached_data[collection_id] = {
-                "info": collection_info,
-                "cached_time": time.time(),
-            }
-            self.settings.set_setting("cached_collections", cached_data)
+            self.cache_store.save_collection_info(collection_id, collection_info)
         except Exception as e:
             print(f"保存缓存失败: {e}")
 
-    def update_collection_photos_cache(self, collection_id, photos):
-        """更新合集照片缓存"""
-        try:
-            cached_data = self.settings.get_setting("cached_collections", {})
-            if collection_id in cached_data:
-                cached_data[collection_id]["photos"] = (photos, time.time())
-                self.settings.set_setting("cached_collections", cached_data)
-        except Exception as e:
-            print(f"更新照片缓存失败: {e}")
-
     def remove_collection_cache(self, collection_id):
         """移除合集缓存（当用户删除自定义合集时调用）"""
         try:
             # 从内存缓存中移除
             self.collection_info_cache.pop(collection_id, None)
-            self.collection_photos_cache.pop(collection_id, None)
+            self.collection_index_cache.pop(collection_id, None)
+            self._index_backoff.pop(collection_id, None)
 
             # 从持久化缓存中移除
-            cached_data = self.settings.get_setting("cached_collections", {})
-            if collection_id in cached_data:
-                del cached_data[collection_id]
-                self.settings.set_setting("cached_collections", cached_data)
-                print(f"已移除合集缓存: {collection_id}")
+            self.cache_store.remove_collection(collection_id)
+            self.selector.reset(f"index:{collection_id}")
+            self.selector.reset(f"listing:{collection_id}")
+            print(f"已移除合集缓存: {collection_id}")
         except Exception as e:
             print(f"移除缓存失败: {e}")
 
@@ -265,44 +607,46 @@ class WallpaperManager(QObject):
         """获取预定义的热门合集"""
         return self.popular_collections
 
-    def search_collections(self, query, per_page=20):
-        """搜索合集"""
-        if not self.unsplash_access_key:
-            return []
-
-        try:
-            url = "https://api.unsplash.com/search/collections"
-            params = {
-                "client_id": self.unsplash_access_key,
-                "query": query,
-                "per_page": per_page,
-            }
+    def search_collections_page(self, query, page=1, per_page=20):
+        """搜索合集的一页结果，失败时抛出异常
 
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-
-            data = response.json()
-            collections = []
-
-            for collection in data.get("results", []):
-                collections.append(
-                    {
-                        "id": collection["id"],
-                        "title": collection["title"],
-                        "description": collection.get("description", ""),
-                        "total_photos": collection["total_photos"],
-                        "preview_photos": [
-                            photo["urls"]["small"]
-                            for photo in collection.get("preview_photos", [])[:3]
-                        ],
-                    }
-                )
+        返回 {"results": [...], "page": 页码, "total": 合集总数, "total_pages": 总页数}。
+        响应由 HttpClient 缓存（见 HTTP_CACHE_POLICY），重复搜索时不再请求。
+        """
+        if not self.unsplash_access_key:
+            return {"results": [], "page": page, "total": 0, "total_pages": 0}
+
+        url = "https://api.unsplash.com/search/collections"
+        params = {
+            "client_id": self.unsplash_access_key,
+            "query": query.strip(),
+            "page": page,
+            "per_page": per_page,
+        }
 
-            return collections
+        data = self.http.get_json(url, params=params)
+        collections = []
+
+        for collection in data.get("results", []):
+            collections.append(
+                {
+                    "id": collection["id"],
+                    "title": collection["title"],
+                    "description": collection.get("description", ""),
+                    "total_photos": collection["total_photos"],
+                    "preview_photos": [
+                        photo["urls"]["small"]
+                        for photo in collection.get("preview_photos", [])[:3]
+                    ],
+                }
+            )
 
-        except Exception as e:
-            print(f"搜索合集失败: {e}")
-            return []
+        return {
+            "results": collections,
+            "page": page,
+            "total": data.get("total", len(collections)),
+            "total_pages": data.get("total_pages", 1),
+        }
 
     def extract_user_from_likes_url(self, url):
         """从用户likes URL中提取用户名"""
@@ -336,6 +680,198 @@ class WallpaperManager(QObject):
             print(f"提取用户名失败: {e}")
             return None
 
+    def extract_collection_id(self, text):
+        """从合集URL或合集ID中提取合集ID，无法识别时返回None"""
+        print(f"正在提取URL中的合集ID: {text}")  # 调试信息
+
+        try:
+            # 清理URL，移除多余的空格和换行
+            text = text.strip()
+
+            # 更新的正则表达式模式，支持字母数字混合ID
+            patterns = [
+                # 新格式：字母数字混合ID（11位左右）
+                r"unsplash\.com/collections/([a-zA-Z0-9_-]+)",  # 标准Unsplash URL
+                r"unsplash\.com/@[^/]+/collections/([a-zA-Z0-9_-]+)",  # 用户合集URL
+                r"/collections/([a-zA-Z0-9_-]+)",  # 路径中的合集
+                r"collections/([a-zA-Z0-9_-]+)",  # 简单的合集路径
+                # 旧格式：纯数字ID（向后兼容）
+                r"unsplash\.com/collections/(\d+)",  # 旧的数字ID格式
+                r"unsplash\.com/@[^/]+/collections/(\d+)",  # 旧的用户合集
+                r"/collections/(\d+)",  # 旧的路径格式
+                r"collections/(\d+)",  # 旧的简单路径
+                r"collection/(\d+)",  # 单数形式（不太常见）
+            ]
+
+            for i, pattern in enumerate(patterns):
+                match = re.search(pattern, text, re.IGNORECASE)
+                if match:
+                    collection_id = match.group(1)
+                    print(f"使用模式 {i+1} 提取到合集ID: {collection_id}")
+
+                    # 验证提取的ID格式是否合理
+                    if self.is_valid_collection_id(collection_id):
+                        return collection_id
+                    else:
+                        print(f"提取的ID格式不合理: {collection_id}")
+                        continue
+
+            # 如果输入的就是一个ID（数字或字母数字混合）
+            if self.is_valid_collection_id(text):
+                print(f"输入的就是合集ID: {text}")
+                return text
+
+            print("无法从URL中提取合集ID")
+            return None
+
+        except Exception as e:
+            print(f"提取合集ID失败: {e}")
+            return None
+
+    def is_valid_collection_id(self, collection_id):
+        """验证合集ID格式是否有效"""
+        if not collection_id:
+            return False
+
+        # 新格式：字母数字混合，通常11位左右
+        if re.match(r"^[a-zA-Z0-9_-]{8,15}$", collection_id):
+            return True
+
+        # 旧格式：纯数字，通常6-8位
+        if re.match(r"^\d{4,10}$", collection_id):
+            return True
+
+        return False
+
+    def parse_import_entries(self, text):
+        """解析批量导入的内容，每行一个合集ID、合集URL或用户likes链接
+
+        用户likes可以写成完整链接，也可以简写为 @用户名/likes。
+        空行和 # 开头的行被忽略。返回 [{"line": 行号, "input": 内容, "collection_id": ID}]，
+        无法识别的行 collection_id 为None。
+        """
+        entries = []
+        for line_number, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            match = re.match(r"^@([a-zA-Z0-9_.-]+)(?:/likes)?/?$", line)
+            username = match.group(1) if match else None
+            if not username and "/likes" in line.lower():
+                username = self.extract_user_from_likes_url(line)
+
+            if username:
+                collection_id = f"user_likes_{username}"
+            else:
+                collection_id = self.extract_collection_id(line)
+
+            entries.append(
+                {"line": line_number, "input": line, "collection_id": collection_id}
+            )
+        return entries
+
+    def import_collections(self, text, progress=None):
+        """批量导入合集和用户likes，返回每一行的导入结果
+
+        每项只需一次请求，按后台优先级并发验证，不占用用户操作的保留配额；
+        超出当前可用配额的项目不会发出请求。全部验证完成后一次性写入设置。
+        每确定一项的状态就调用 progress(结果)。
+
+        结果为 {"line", "input", "collection_id", "status", "message", "name"}，
+        status 为 added（已添加）、valid（验证通过，尚未写入）、exists（已添加过）、
+        duplicate（与前面的行重复）、invalid（无法识别）、failed（验证失败）
+        或 skipped（配额不足，未验证）。
+        """
+        entries = self.parse_import_entries(text)
+        existing_ids = set(self.settings.get_custom_collections().values())
+
+        def report(result, status, message):
+            result["status"] = status
+            result["message"] = message
+            if progress:
+                progress(dict(result))
+
+        results = []
+        pending = []
+        seen = set()
+        for entry in entries:
+            result = dict(entry, status=None, message="", name="")
+            results.append(result)
+
+            collection_id = entry["collection_id"]
+            if not collection_id:
+                report(result, "invalid", "无法识别的合集ID或链接")
+            elif collection_id in existing_ids:
+                report(result, "exists", "已经添加过")
+            elif collection_id in seen:
+                report(result, "duplicate", "与前面的行重复")
+            else:
+                seen.add(collection_id)
+                pending.append(result)
+
+        # 配额不足时只验证能负担的部分，其余的稍后重新导入
+        budget = self._import_budget()
+        for result in pending[budget:]:
+            report(result, "skipped", "API配额不足，请稍后重新导入")
+        pending = pending[:budget]
+
+        def validate(collection_id):
+            with self.http.background():
+                return self.get_collection_info(collection_id)
+
+        validated = {}
+        if pending:
+            workers = min(self.settings.get_setting("import_concurrency", 4), len(pending))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(validate, result["collection_id"]): result
+                    for result in pending
+                }
+                for future in as_completed(futures):
+                    result = futures[future]
+                    try:
+                        info = future.result()
+                    except Exception as e:
+                        report(result, "failed", str(e))
+                        continue
+
+                    if not info or not info.get("total_photos"):
+                        report(result, "failed", "合集不存在、没有照片或网络连接问题")
+                        continue
+
+                    result["name"] = info.get("title") or result["collection_id"]
+                    validated[result["collection_id"]] = info
+                    report(result, "valid", f"验证通过，{info.get('total_photos', 0)} 张照片")
+
+        # 按输入顺序添加，所有修改合并为一次设置写入
+        names = set(self.settings.get_custom_collections())
+        with self.settings.batch():
+            for result in results:
+                info = validated.get(result["collection_id"])
+                if result["status"] != "valid" or not info:
+                    continue
+
+                name = result["name"]
+                if name in names:
+                    name = f"{name} ({result['collection_id']})"
+                names.add(name)
+                result["name"] = name
+
+                self.settings.add_custom_collection(name, result["collection_id"])
+                self.cache_validated_collection(result["collection_id"], info)
+                result["status"] = "added"
+                result["message"] = "已添加"
+
+        added = sum(1 for result in results if result["status"] == "added")
+        print(f"批量导入完成: 共 {len(results)} 项，添加 {added} 项")
+        return results
+
+    def _import_budget(self):
+        """批量导入可以使用的请求数（扣除留给用户操作的配额）"""
+        status = self.rate_limiter.status()
+        return max(0, int(status["remaining"] - status["interactive_reserve"]))
+
     def get_user_info(self, username):
         """获取用户基本信息"""
         if not self.unsplash_access_key:
@@ -345,10 +881,7 @@ class WallpaperManager(QObject):
             url = f"https://api.unsplash.com/users/{username}"
             params = {"client_id": self.unsplash_access_key}
 
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-
-            user_info = response.json()
+            user_info = self.http.get_json(url, params=params)
             return {
                 "id": user_info.get("id"),
                 "username": user_info.get("username"),
@@ -380,10 +913,7 @@ class WallpaperManager(QObject):
 
             print(f"请求用户likes: {username} (页面: {page})")
 
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-
-            photos = response.json()
+            photos = self.http.get_json(url, params=params)
             print(f"获取到 {len(photos)} 张likes照片")
             return photos
 
@@ -436,58 +966,53 @@ class WallpaperManager(QObject):
             return collection_id.replace("user_likes_", "")
         return None
 
-    def validate_user_likes(self, username):
-        """验证用户是否存在且有likes"""
-        user_info = self.get_user_info(username)
+    def validate_user_likes(self, username, progress=None):
+        """验证用户是否存在且有likes（用户信息和第一页likes同时请求）"""
+        results = self._fan_out(
+            {
+                "user": lambda: self.get_user_info(username),
+                "likes": lambda: self.get_user_likes(username, per_page=1),
+            },
+            progress,
+        )
+
+        user_info = results["user"]
         if not user_info:
             return False, "用户不存在"
 
         if user_info["total_likes"] == 0:
             return False, f"用户 {user_info['name'] or username} 还没有likes任何照片"
 
-        # 尝试获取第一页likes来确认可以访问
-        likes = self.get_user_likes(username, per_page=1)
+        # 第一页likes用来确认可以访问
+        likes = results["likes"]
         if not likes:
             return False, "无法获取用户的likes"
 
         return True, user_info
 
+    def select_from_user_likes(self, username):
+        """从用户likes中选择一张照片（只请求列表，不下载图片）"""
+        # 根据likes总数直接定位到某一页的某一张，只需一次列表请求
+        total_likes = self._get_listing_total(
+            f"user_likes_{username}",
+            lambda: (self.get_user_info(username) or {}).get("total_likes", 0),
+        )
+        return self._sample_from_listing(
+            f"listing:user_likes_{username}",
+            lambda page, per_page: self.get_user_likes(username, per_page, page),
+            total_likes,
+        )
+
     def download_from_user_likes(self, username, width, height):
         """从用户likes中下载壁纸"""
         try:
-            # 随机选择页面（假设用户有多页likes）
-            page = random.randint(1, 5)  # 最多尝试前5页 API遭不住
-            photos = self.get_user_likes(username, per_page=30, page=page)
-
-            if not photos:
-                # 如果随机页面没有照片，尝试第一页
-                photos = self.get_user_likes(username, per_page=30, page=1)
-
-            if not photos:
+            photo = self.select_from_user_likes(username)
+            if not photo:
                 print(f"用户 {username} 的likes中没有找到照片")
                 return None
 
-            # 随机选择一张照片
-            photo = random.choice(photos)
-            image_url = photo["urls"]["raw"]
-
-            # 构建下载URL
-            download_url = f"{image_url}&w={width}&h={height}&fit=crop&crop=entropy"
-
-            # 下载图片
-            image_response = requests.get(download_url, timeout=60)
-            image_response.raise_for_status()
-
-            # 保存图片
-            timestamp = int(time.time())
-            filename = f"wallpaper_{timestamp}.jpg"
-            filepath = os.path.join(self.wallpaper_dir, filename)
-
-            with open(filepath, "wb") as f:
-                f.write(image_response.content)
-
-            # 清理旧的壁纸文件
-            self._cleanup_old_wallpapers()
+            # 下载图片（已下载过的照片直接使用缓存）
+            filepath = self._download_photo(photo, width, height)
 
             print(
                 f"从用户 {username} 的likes下载壁纸成功: {photo.get('description', '无描述')}"
@@ -498,73 +1023,234 @@ class WallpaperManager(QObject):
             print(f"从用户likes下载壁纸失败: {e}")
             return None
 
+    def _get_listing_total(self, key, loader, max_age=24 * 3600):
+        """获取合集照片总数或用户likes总数（内存缓存，默认1天有效）"""
+        cached = self._listing_totals.get(key)
+        if cached and time.time() - cached[1] < max_age:
+            return cached[0]
+
+        total = loader()
+        if total:
+            self._listing_totals[key] = (total, time.time())
+        return total
+
+    def _sample_from_listing(self, selection_key, fetch_page, total, per_page=30):
+        """从分页列表中抽取一张照片，一轮用完之前不重复
+
+        按来源的选图进度选择一个位置，直接换算成页码和页内偏移，
+        因此只需一次列表请求，且不会请求到空页。
+        fetch_page(page, per_page) 返回该页的照片列表。
+        """
+        if total <= 0:
+            return None
+
+        index = self.selector.next_index(selection_key, total)
+        page, offset = divmod(index, per_page)
+        photos = fetch_page(page + 1, per_page)
+        if not photos:
+            return None
+
+        # 缓存的总数可能略大于实际数量（照片被删除），偏移越界时取该页最后一张
+        return photos[min(offset, len(photos) - 1)]
+
+    def _get_source_key(self):
+        """根据当前设置获取壁纸来源标识（用于区分预取队列）"""
+        quality = self.settings.get_setting("quality", "high")
+
+        use_user_likes = self.settings.get_setting("use_user_likes", False)
+        selected_user = self.settings.get_setting("selected_user", "")
+        if use_user_likes and selected_user:
+            return ("user_likes", selected_user, quality)
+
+        use_collection = self.settings.get_setting("use_collection", False)
+        selected_collection = self.settings.get_setting("selected_collection", "")
+        if use_collection and selected_collection:
+            return ("collection", selected_collection, quality)
+
+        return ("random", self.settings.get_setting("keywords", ""), quality)
+
     def download_wallpaper(self):
         """从Unsplash下载壁纸"""
+        return self._download_from_source(self._get_source_key())
+
+    def _download_from_source(self, source_key, resolution=None):
+        """从指定来源下载一张壁纸
+
+        resolution 为屏幕各画质对应的尺寸，默认使用主屏幕；
+        实际画质按网速在设置的画质上限内选择。
+        """
         if not self.unsplash_access_key:
             print("未设置Unsplash API密钥")
             return None
 
         try:
-            resolution = self.get_screen_resolution()
-            quality = self.settings.get_setting("quality", "high")
-            width, height = resolution.get(quality, resolution["medium"])
+            source_type, source_value, ceiling = source_key
+            if resolution is None:
+                resolution = self.get_screen_resolution()
+            quality, estimate = self.choose_quality(ceiling, resolution)
+            width, height = resolution[quality]
 
-            # 检查是否启用了用户likes模式
-            use_user_likes = self.settings.get_setting("use_user_likes", False)
-            selected_user = self.settings.get_setting("selected_user", "")
-
-            # 检查是否启用了合集模式
-            use_collection = self.settings.get_setting("use_collection", False)
-            selected_collection = self.settings.get_setting("selected_collection", "")
-
-            if use_user_likes and selected_user:
+            if source_type == "user_likes":
                 # 从用户likes中下载
-                print(f"从用户 {selected_user} 的likes下载壁纸")
-                return self.download_from_user_likes(selected_user, width, height)
-            elif use_collection and selected_collection:
+                print(f"从用户 {source_value} 的likes下载壁纸")
+                path = self.download_from_user_likes(source_value, width, height)
+            elif source_type == "collection":
                 # 从合集中下载
-                print(f"从合集 {selected_collection} 下载壁纸")
-                return self.download_from_collection(selected_collection, width, height)
+                print(f"从合集 {source_value} 下载壁纸")
+                path = self.download_from_collection(source_value, width, height)
             else:
                 # 从随机照片或关键词搜索中下载
                 print("下载随机壁纸")
-                return self.download_random_wallpaper(width, height)
+                path = self.download_random_wallpaper(width, height)
+
+            if path:
+                self._remember_download(
+                    path, self._make_download_info(source_key, quality, (width, height), estimate)
+                )
+            return path
 
         except Exception as e:
             print(f"下载壁纸时发生未知错误: {e}")
             return None
 
-    def download_from_collection(self, collection_id, width, height):
-        """从指定合集下载壁纸"""
+    def _select_photo(self, source_key):
+        """按来源选择一张照片（不下载图片）"""
+        source_type, source_value, _ = source_key
+        if source_type == "user_likes":
+            return self.select_from_user_likes(source_value)
+        elif source_type == "collection":
+            return self.select_from_collection(source_value)
+        return self._next_random_photo(source_value)
+
+    def _download_progressively(self, source_key):
+        """选择一张照片并先下载 regular 版本（约100KB），用于立即应用
+
+        完整尺寸已在缓存中时直接返回完整尺寸；否则返回预览图路径，
+        并记录待下载的完整尺寸，更换完成后在后台下载并替换。失败时返回None。
+        """
         try:
-            # 获取合集中的照片
-            photos = self.get_collection_photos(collection_id)
-
-            if not photos:
-                print("合集中没有找到照片")
+            photo = self._select_photo(source_key)
+            if not photo:
                 return None
 
-            # 随机选择一张照片
-            photo = random.choice(photos)
-            image_url = photo["urls"]["raw"]
+            resolution = self.get_screen_resolution()
+            quality, estimate = self.choose_quality(source_key[2], resolution)
+            size = resolution[quality]
+            info = self._make_download_info(source_key, quality, size, estimate)
+
+            full_path = self.image_cache.get(ImageCache.make_key(photo["id"], *size))
+            if full_path:
+                self._remember_download(full_path, info)
+                return full_path
+
+            key = ImageCache.make_rendition_key(photo["id"], "regular")
+            preview_path = self.image_cache.get(key)
+            if not preview_path:
+                preview_url = photo["urls"].get("regular") or photo["urls"]["small"]
+                preview_path = self.image_cache.path_for(key)
+                size_bytes = self.http.download_to_file(preview_url, preview_path)
+                self.image_cache.put(key, self._protected_paths())
+                print(f"预览图下载完成: {size_bytes / 1024:.0f} KB")
+
+            with self._download_info_lock:
+                self._pending_upgrades[preview_path] = (photo, size, info)
+            self._remember_download(preview_path, dict(info, quality="preview"))
+            return preview_path
 
-            # 构建下载URL
-            download_url = f"{image_url}&w={width}&h={height}&fit=crop&crop=entropy"
+        except Exception as e:
+            print(f"下载预览图失败: {e}")
+            return None
 
-            # 下载图片
-            image_response = requests.get(download_url, timeout=60)
-            image_response.raise_for_status()
+    def _make_download_info(self, source_key, quality, size, estimate):
+        return {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "source": list(source_key[:2]),
+            "quality_ceiling": source_key[2],
+            "quality": quality,
+            "size": list(size),
+            "estimated_seconds": round(estimate, 1) if estimate is not None else None,
+        }
 
-            # 保存图片
-            timestamp = int(time.time())
-            filename = f"wallpaper_{timestamp}.jpg"
-            filepath = os.path.join(self.wallpaper_dir, filename)
+    def choose_quality(self, ceiling, resolution):
+        """在画质上限内选择预计能在时间预算内下载完成的最高画质
+
+        返回 (画质, 预计下载秒数)；还没有测速数据时直接使用上限。
+        """
+        if ceiling not in self.QUALITY_LEVELS:
+            ceiling = "medium"
+        if not self.settings.get_setting("adaptive_quality", True):
+            return ceiling, None
+
+        budget = self.settings.get_setting("download_time_budget", 15)
+        candidates = self.QUALITY_LEVELS[: self.QUALITY_LEVELS.index(ceiling) + 1]
+        estimate = None
+        for quality in reversed(candidates):
+            width, height = resolution[quality]
+            estimate = self.bandwidth.estimate_seconds(width * height)
+            if estimate is None or estimate <= budget:
+                if quality != ceiling:
+                    print(f"网速较慢，画质从 {ceiling} 降低到 {quality}（预计 {estimate:.1f} 秒）")
+                return quality, estimate
+
+        print(f"网速很慢，使用最低画质（预计 {estimate:.1f} 秒）")
+        return candidates[0], estimate
+
+    def _remember_download(self, path, info):
+        """记录图片下载时选择的画质，更换壁纸时作为诊断信息"""
+        with self._download_info_lock:
+            self._download_info[path] = info
+            while len(self._download_info) > 20:
+                self._download_info.pop(next(iter(self._download_info)))
+
+    def _take_download_info(self, path):
+        with self._download_info_lock:
+            return self._download_info.pop(path, None)
+
+    def select_from_collection(self, collection_id):
+        """从合集中选择一张照片（不下载图片）"""
+        # 已建立完整索引时从整个合集中选择，不消耗API请求
+        index = self.get_collection_index(collection_id)
+        if index and index[0] and index[1]:
+            photos = index[0]
+            position = self.selector.next_index(f"index:{collection_id}", len(photos))
+            print(f"从合集索引中选择第 {position + 1}/{len(photos)} 张")
+            return photos[position]
+
+        # 没有索引或索引被中断：按照片总数在整个合集中均匀抽取一张。
+        # 页数不超过上限的合集尚未建立索引或上次被中断时在后台（重新）建立索引，
+        # 失败后的退避时间内不会重复安排
+        total_photos = self._get_listing_total(
+            collection_id,
+            lambda: (
+                self.get_collection_info(
+                    collection_id,
+                    cache_if_added=self.is_collection_added(collection_id),
+                )
+                or {}
+            ).get("total_photos", 0),
+        )
+        if (
+            index is None or collection_id in self._index_backoff
+        ) and self._is_indexable(total_photos):
+            self.schedule_collection_index(collection_id)
+        return self._sample_from_listing(
+            f"listing:{collection_id}",
+            lambda page, per_page: self._fetch_collection_page(
+                collection_id, page, per_page
+            ),
+            total_photos,
+        )
 
-            with open(filepath, "wb") as f:
-                f.write(image_response.content)
+    def download_from_collection(self, collection_id, width, height):
+        """从指定合集下载壁纸"""
+        try:
+            photo = self.select_from_collection(collection_id)
+            if not photo:
+                print("合集中没有找到照片")
+                return None
 
-            # 清理旧的壁纸文件
-            self._cleanup_old_wallpapers()
+            # 下载图片（已下载过的照片直接使用缓存）
+            filepath = self._download_photo(photo, width, height)
 
             print(f"从合集下载壁纸成功: {photo.get('description', '无描述')}")
             return filepath
@@ -573,49 +1259,84 @@ class WallpaperManager(QObject):
             print(f"从合集下载壁纸失败: {e}")
             return None
 
-    def download_random_wallpaper(self, width, height):
-        """下载随机壁纸（原有功能）"""
-        try:
-            # 构建Unsplash API请求
-            params = {
-                "client_id": self.unsplash_access_key,
-                "w": width,
-                "h": height,
-                "fit": "crop",
-                "crop": "entropy",
-            }
-
-            # 添加搜索关键词（如果设置了的话）
-            keywords = self.settings.get_setting("keywords", "")
-            if keywords:
-                params["query"] = keywords
-                url = "https://api.unsplash.com/photos/random"
-            else:
-                url = "https://api.unsplash.com/photos/random"
-
-            # 发送请求
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
+    def _fetch_random_batch(self, keywords):
+        """一次请求获取一批随机照片（count参数最多30张）"""
+        url = "https://api.unsplash.com/photos/random"
+        params = {
+            "client_id": self.unsplash_access_key,
+            "count": self.settings.get_setting("random_batch_size", 30),
+        }
 
-            data = response.json()
-            image_url = data["urls"]["raw"]
+        # 添加搜索关键词（如果设置了的话）
+        if keywords:
+            params["query"] = keywords
 
-            # 下载图片
-            image_response = requests.get(image_url, timeout=60)
-            image_response.raise_for_status()
+        response = self.http.get(url, params=params)
+        response.raise_for_status()
+        return [compact_photo(photo) for photo in response.json()]
 
-            # 保存图片
-            timestamp = int(time.time())
-            filename = f"wallpaper_{timestamp}.jpg"
-            filepath = os.path.join(self.wallpaper_dir, filename)
+    def _refill_random_pool(self, keywords):
+        """请求一批随机照片并加入照片池"""
+        try:
+            photos = self._fetch_random_batch(keywords)
+            with self._random_pool_lock:
+                self._random_pools.setdefault(keywords, deque()).extend(photos)
+            print(f"随机照片池已补充 {len(photos)} 张 (关键词: {keywords or '无'})")
+        finally:
+            with self._random_pool_lock:
+                self._random_refilling.discard(keywords)
+                self._random_pool_refilled.notify_all()
+
+    def _next_random_photo(self, keywords):
+        """从随机照片池中取出一张照片，剩余不多时在后台补充
+
+        照片池为空时同步请求一批；每批最多30张，只消耗一次API请求。
+        已有补充请求在进行中时等待它完成，不再重复请求。
+        """
+        with self._random_pool_lock:
+            pool = self._random_pools.setdefault(keywords, deque())
+            while not pool and keywords in self._random_refilling:
+                if not self._random_pool_refilled.wait(timeout=60):
+                    break
+
+            # 等待的补充失败（如后台请求被限流）时由当前调用方重新请求
+            need_refill_now = not pool and keywords not in self._random_refilling
+            if need_refill_now:
+                self._random_refilling.add(keywords)
+
+        if need_refill_now:
+            self._refill_random_pool(keywords)
+
+        with self._random_pool_lock:
+            pool = self._random_pools.setdefault(keywords, deque())
+            photo = pool.popleft() if pool else None
+
+            # 剩余数量低于阈值时在后台补充
+            low_water = self.settings.get_setting("random_pool_low_water", 5)
+            start_refill = (
+                photo is not None
+                and len(pool) < low_water
+                and keywords not in self._random_refilling
+            )
+            if start_refill:
+                self._random_refilling.add(keywords)
 
-            with open(filepath, "wb") as f:
-                f.write(image_response.content)
+        if start_refill:
+            self.run_in_background(self._refill_random_pool, keywords)
+        return photo
 
-            # 清理旧的壁纸文件
-            self._cleanup_old_wallpapers()
+    def download_random_wallpaper(self, width, height):
+        """下载随机壁纸（原有功能）"""
+        try:
+            # 从本地照片池中取一张（关键词为空时即随机照片）
+            keywords = self.settings.get_setting("keywords", "")
+            photo = self._next_random_photo(keywords)
+            if not photo:
+                print("没有获取到随机照片")
+                return None
 
-            return filepath
+            # 下载图片（按屏幕尺寸裁剪，而不是下载原图）
+            return self._download_photo(photo, width, height)
 
         except requests.exceptions.RequestException as e:
             print(f"网络请求失败: {e}")
@@ -632,8 +1353,25 @@ class WallpaperManager(QObject):
         interval_ms = self._convert_frequency_to_ms(frequency)
         self.timer.start(interval_ms)
 
+        # 启动时就开始预取，第一次更换即可直接应用
+        self.schedule_prefetch()
+
     def stop_timer(self):
         self.timer.stop()
+        self.retry_timer.stop()
+        self.connectivity_timer.stop()
+
+    def shutdown(self):
+        """退出前停止定时器并丢弃尚未开始的后台任务"""
+        self.stop_timer()
+        self.thread_pool.clear()
+        self.background_pool.clear()
+        self.thread_pool.waitForDone(2000)
+        self.background_pool.waitForDone(2000)
+        self.image_cache.flush()
+        self.thumbnail_cache.flush()
+        self.http.close()
+        self.cache_store.close()
 
     def _convert_frequency_to_ms(self, frequency):
         frequency_map = {
@@ -645,112 +1383,415 @@ class WallpaperManager(QObject):
         return frequency_map.get(frequency, 60 * 60 * 1000)
 
     def get_screen_resolution(self):
-        if platform.system() == "Windows":
-            try:
-                user32 = ctypes.windll.user32
-                base_width = user32.GetSystemMetrics(0)
-                base_height = user32.GetSystemMetrics(1)
-
-                hdc = user32.GetDC(0)
-                dpi = ctypes.windll.gdi32.GetDeviceCaps(hdc, 88)
-                user32.ReleaseDC(0, hdc)
-                density = max(1, dpi / 96)
-
-                width = int(base_width * density)
-                height = int(base_height * density)
-
-                ratio = base_width / base_height
-                if ratio >= 2:
-                    width = int(height * 2)
-                elif ratio <= 0.5:
-                    height = int(width * 2)
-
-                if width >= 3840 or height >= 2160:
-                    resolution_levels = {
-                        "full": (width, height),
-                        "high": (2560, 1440),
-                        "medium": (1920, 1080),
-                        "small": (1280, 720),
-                        "base": (base_width, base_height),
-                    }
-                elif width >= 2560 or height >= 1440:
-                    resolution_levels = {
-                        "full": (2560, 1440),
-                        "high": (2560, 1440),
-                        "medium": (1920, 1080),
-                        "small": (1280, 720),
-                        "base": (base_width, base_height),
-                    }
-                else:
-                    resolution_levels = {
-                        "full": (1920, 1080),
-                        "high": (1920, 1080),
-                        "medium": (1280, 720),
-                        "small": (960, 540),
-                        "base": (base_width, base_height),
-                    }
-
-                return resolution_levels
-            except Exception as e:
-                print(f"获取屏幕分辨率失败: {e}")
-                return self._get_default_resolution()
-        else:
-            return self._get_default_resolution()
-
-    def _get_default_resolution(self):
-        return {
-            "full": (3840, 2160),
-            "high": (2560, 1440),
-            "medium": (1920, 1080),
-            "small": (1280, 720),
-            "base": (1920, 1080),
-        }
+        """主屏幕各画质对应的下载尺寸（读取缓存，可在后台线程调用）"""
+        return self.screen_info.resolution_levels()
 
     def change_wallpaper(self):
-        try:
-            wallpaper_path = self.download_wallpaper()
+        """异步更换壁纸，结果通过 wallpaper_changed / error_occurred 信号返回"""
+        if self._changing:
+            print("壁纸正在更换中，忽略本次请求")
+            return
+
+        self._changing = True
+        self._change_generation += 1
+        source_key = self._get_source_key()
+        self.run_async(
+            self._change_wallpaper_task,
+            source_key,
+            on_result=self._on_change_finished,
+            on_error=self._on_change_failed,
+        )
+
+    def _change_wallpaper_task(self, source_key):
+        """在后台线程中获取并设置壁纸，返回壁纸路径"""
+        screens = self.screen_info.screens()
+        per_screen = (
+            self.settings.get_setting("multi_monitor_mode", "single") == "per_screen"
+            and len(screens) > 1
+        )
+        if per_screen and not self._offline:
+            wallpaper_path = self._change_per_screen(source_key, screens)
             if wallpaper_path:
-                self._set_wallpaper(wallpaper_path)
-                self.current_wallpaper = wallpaper_path
-                self.wallpaper_changed.emit(wallpaper_path)
+                return wallpaper_path
+            print("多屏幕壁纸更换失败，所有屏幕使用同一张壁纸")
+
+        # 优先使用预取好的壁纸，只有队列为空时才现场下载
+        wallpaper_path = self.prefetch_queue.pop(source_key)
+        if wallpaper_path:
+            print(f"使用预取的壁纸: {wallpaper_path}")
+        elif not self._offline:
+            # 渐进模式：先应用小尺寸版本，完整尺寸稍后替换
+            if self.settings.get_setting("progressive_apply", True):
+                wallpaper_path = self._download_progressively(source_key)
+            if not wallpaper_path:
+                wallpaper_path = self._download_from_source(source_key)
+            if not wallpaper_path and not self._is_online():
+                print("网络不可用，切换到离线轮换")
+                self._offline = True
+
+        change_info = self._take_download_info(wallpaper_path) if wallpaper_path else None
+
+        # 离线或下载失败时从本地图片中轮换，不浪费这次更换
+        if not wallpaper_path and self.settings.get_setting("offline_rotation", True):
+            wallpaper_path = self.offline_rotation.next(exclude=self.current_wallpaper)
+            if wallpaper_path:
+                print(f"使用本地壁纸: {wallpaper_path}")
+                change_info = {"source": "offline"}
+
+        if wallpaper_path:
+            self._set_wallpaper(wallpaper_path)
+            self._screen_wallpapers = []
+            self.last_change_info = change_info
+        return wallpaper_path
+
+    def _change_per_screen(self, source_key, screens):
+        """为每个屏幕获取尺寸合适的图片并应用，失败时返回None
+
+        主屏幕优先使用预取的图片，其余屏幕按各自的物理分辨率并行下载。
+        桌面支持时为每个屏幕单独设置，否则在本地合成一张横跨所有屏幕的图片。
+        返回值为主屏幕的图片或合成的图片路径。
+        """
+        primary = next((i for i, screen in enumerate(screens) if screen["primary"]), 0)
+        paths = [None] * len(screens)
+        paths[primary] = self.prefetch_queue.pop(source_key)
+
+        def download(index):
+            levels = build_resolution_levels(*screens[index]["physical"])
+            return index, self._download_from_source(source_key, levels)
+
+        missing = [index for index, path in enumerate(paths) if not path]
+        with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+            # 下载在线程池中进行，沿用当前线程的请求优先级
+            for index, path in executor.map(
+                self.http.wrap_current_priority(download), missing
+            ):
+                paths[index] = path
+
+        if not all(paths):
+            return None
+
+        self.last_change_info = {
+            "screens": [self._take_download_info(path) for path in paths]
+        }
+        if multi_monitor.supports_per_screen():
+            if multi_monitor.set_per_screen_wallpapers(paths, screens, paths[primary]):
+                self._screen_wallpapers = paths
+                print(f"已为 {len(paths)} 个屏幕分别设置壁纸")
             else:
-                self.error_occurred.emit("下载壁纸失败")
-        except Exception as e:
-            self.error_occurred.emit(f"更换壁纸时发生错误: {str(e)}")
+                self._screen_wallpapers = [paths[primary]] * len(paths)
+            return paths[primary]
 
-    def _set_wallpaper(self, wallpaper_path):
+        spanned_path = multi_monitor.compose_spanned(paths, screens, self.wallpaper_dir)
+        if not spanned_path:
+            return None
+        self._set_wallpaper(spanned_path, spanned=True)
+        self._screen_wallpapers = paths
+        print(f"已合成横跨 {len(paths)} 个屏幕的壁纸: {spanned_path}")
+        return spanned_path
+
+    def _on_change_finished(self, wallpaper_path):
+        self._changing = False
+        if wallpaper_path:
+            self.current_wallpaper = wallpaper_path
+            self._change_retries = 0
+            self.retry_timer.stop()
+            self.wallpaper_changed.emit(wallpaper_path)
+
+            with self._download_info_lock:
+                upgrade = self._pending_upgrades.pop(wallpaper_path, None)
+                self._pending_upgrades.clear()
+            if upgrade:
+                self._start_upgrade(wallpaper_path, *upgrade)
+        else:
+            self.error_occurred.emit("下载壁纸失败")
+            self._schedule_change_retry()
+
+        if self._offline:
+            self._start_connectivity_probe()
+        self.schedule_prefetch()
+
+    def _is_offline_candidate(self, path):
+        """离线轮换只使用可以直接设置到单个屏幕的图片
+
+        图片缓存中只使用按屏幕尺寸裁剪好的图片，不使用母版和预览图；
+        也不使用横跨多个屏幕的合成图。
+        """
+        filename = os.path.basename(path)
+        if filename.startswith("spanned_"):
+            return False
+        if os.path.dirname(path) == os.path.abspath(self.image_cache.directory):
+            return ImageCache.is_variant_key(os.path.splitext(filename)[0])
+        return True
+
+    def _is_online(self):
+        """检测能否连接到Unsplash API"""
+        return self.http.probe("https://api.unsplash.com/")
+
+    def _start_connectivity_probe(self):
+        if not self.connectivity_timer.isActive():
+            interval = self.settings.get_setting("connectivity_probe_interval", 60)
+            self.connectivity_timer.start(interval * 1000)
+
+    def check_connectivity(self):
+        """离线时定时检测网络，恢复后在后台重新开始预取"""
+        self.run_async(self._is_online, on_result=self._on_connectivity_checked)
+
+    def _on_connectivity_checked(self, online):
+        if not online or not self._offline:
+            return
+
+        print("网络已恢复，重新开始下载壁纸")
+        self._offline = False
+        self.connectivity_timer.stop()
+        self.schedule_prefetch()
+
+    def _start_upgrade(self, preview_path, photo, size, info):
+        """在后台下载完整尺寸，完成后在GUI线程中替换当前的预览图"""
+        generation = self._change_generation
+        self.run_async(
+            self._download_photo,
+            photo,
+            *size,
+            on_result=lambda path: self._on_upgrade_finished(
+                generation, preview_path, info, path
+            ),
+        )
+
+    def _on_upgrade_finished(self, generation, preview_path, info, path):
+        # 下载期间已经开始或完成了另一次更换，不再替换
+        if not path or generation != self._change_generation or self._changing:
+            return
+        if self.current_wallpaper != preview_path:
+            return
+
+        # 设置壁纸会阻塞，放到线程池中执行；期间占用 _changing，
+        # 手动或定时更换会被忽略，不会与替换同时设置壁纸
+        self._changing = True
+        self.run_async(
+            self._set_wallpaper,
+            path,
+            on_result=lambda _: self._on_upgrade_applied(info, path),
+            on_error=self._on_upgrade_failed,
+        )
+
+    def _on_upgrade_applied(self, info, path):
+        self._changing = False
+        print(f"已替换为完整尺寸: {info['size'][0]} x {info['size'][1]}")
+        self.current_wallpaper = path
+        self.last_change_info = info
+        self.wallpaper_changed.emit(path)
+
+    def _on_upgrade_failed(self, message):
+        self._changing = False
+        print(f"替换为完整尺寸失败: {message}")
+
+    def _on_change_failed(self, message):
+        self._changing = False
+        with self._download_info_lock:
+            self._pending_upgrades.clear()
+        self.error_occurred.emit(f"更换壁纸时发生错误: {message}")
+        self._schedule_change_retry()
+        self.schedule_prefetch()
+
+    def _schedule_change_retry(self):
+        """更换失败后提前重试，等待时间逐次翻倍（带随机抖动）
+
+        只在定时更换开启时重试；重试时间晚于下一次定时更换时不再安排。
+        """
+        if not self.timer.isActive():
+            return
+
+        base = self.settings.get_setting("change_retry_delay", 60)
+        max_delay = self.settings.get_setting("change_retry_max_delay", 1800)
+        delay = min(max_delay, base * 2 ** self._change_retries)
+        delay = random.uniform(delay / 2, delay)
+        delay_ms = int(delay * 1000)
+
+        if delay_ms >= self.timer.remainingTime():
+            return
+
+        self._change_retries += 1
+        self.retry_timer.start(delay_ms)
+        print(f"更换壁纸失败，{delay:.0f} 秒后重试（第 {self._change_retries} 次）")
+
+    def get_diagnostics(self):
+        """获取网络请求、重试和缓存的诊断信息"""
+        diagnostics = self.http.get_diagnostics()
+        diagnostics["offline"] = self._offline
+        diagnostics["change_retries"] = self._change_retries
+        diagnostics["change_retry_pending_ms"] = (
+            self.retry_timer.remainingTime() if self.retry_timer.isActive() else None
+        )
+        diagnostics["image_cache"] = self.image_cache.stats()
+        diagnostics["bandwidth"] = self.bandwidth.status()
+        diagnostics["last_change"] = self.last_change_info
+        return diagnostics
+
+    def schedule_prefetch(self):
+        """在后台补充当前来源的预取队列（离线时暂停）
+
+        来源或画质改变后清空旧来源的队列，其中的图片不再受缓存淘汰保护。
+        """
+        source_key = self._get_source_key()
+        if source_key != self._prefetch_source_key:
+            if self._prefetch_source_key is not None:
+                print(f"壁纸来源已改变，清空预取队列: {self._prefetch_source_key}")
+                self.prefetch_queue.clear(self._prefetch_source_key)
+            self._prefetch_source_key = source_key
+
+        if not self.unsplash_access_key or self._offline:
+            return
+
+        # 预取属于后台任务（在后台线程池中执行），配额紧张时让位于用户操作
+        self.prefetch_queue.refill(
+            source_key, lambda: self._download_from_source(source_key)
+        )
+
+    def _set_wallpaper(self, wallpaper_path, spanned=False):
+        """设置壁纸，spanned 为True时图片横跨所有屏幕"""
         try:
             if platform.system() == "Windows":
+                self._set_windows_span(spanned)
                 ctypes.windll.user32.SystemParametersInfoW(20, 0, wallpaper_path, 3)
             elif platform.system() == "Darwin":
                 os.system(
                     f'osascript -e \'tell application "Finder" to set desktop picture to POSIX file "{wallpaper_path}"\''
                 )
             else:
+                self._set_gnome_span(spanned)
                 os.system(
                     f"gsettings set org.gnome.desktop.background picture-uri file://{wallpaper_path}"
                 )
         except Exception as e:
             raise Exception(f"设置壁纸失败: {str(e)}")
 
-    def _cleanup_old_wallpapers(self):
-        try:
-            files = []
-            for filename in os.listdir(self.wallpaper_dir):
-                if filename.startswith("wallpaper_") and filename.endswith(".jpg"):
-                    filepath = os.path.join(self.wallpaper_dir, filename)
-                    files.append((filepath, os.path.getctime(filepath)))
+    def _set_windows_span(self, spanned):
+        """切换Windows的“跨区”壁纸样式；取消跨区时恢复开启跨区前的样式"""
+        import winreg
 
-            files.sort(key=lambda x: x[1], reverse=True)
+        def query(key, name):
+            try:
+                return winreg.QueryValueEx(key, name)[0]
+            except OSError:
+                return None  # 没有这个值
 
-            for filepath, _ in files[5:]:
-                try:
-                    os.remove(filepath)
-                except OSError:
-                    pass
+        try:
+            with winreg.OpenKey(
+                winreg.HKEY_CURRENT_USER,
+                r"Control Panel\Desktop",
+                0,
+                winreg.KEY_READ | winreg.KEY_SET_VALUE,
+            ) as key:
+                style = query(key, "WallpaperStyle")  # 没有这个值时视为未跨区
+                if spanned:
+                    if style != "22":
+                        # 记住用户原来的样式，取消跨区时恢复
+                        self.settings.set_setting(
+                            "windows_style_before_span",
+                            [style or "10", query(key, "TileWallpaper") or "0"],
+                        )
+                    winreg.SetValueEx(key, "WallpaperStyle", 0, winreg.REG_SZ, "22")
+                    winreg.SetValueEx(key, "TileWallpaper", 0, winreg.REG_SZ, "0")
+                elif style == "22":
+                    previous_style, previous_tile = self.settings.get_setting(
+                        "windows_style_before_span"
+                    ) or ["10", "0"]
+                    winreg.SetValueEx(
+                        key, "WallpaperStyle", 0, winreg.REG_SZ, previous_style
+                    )
+                    winreg.SetValueEx(
+                        key, "TileWallpaper", 0, winreg.REG_SZ, previous_tile
+                    )
+        except OSError as e:
+            print(f"切换跨区壁纸样式失败: {e}")
+
+    def _set_gnome_span(self, spanned):
+        """切换GNOME的 spanned 壁纸选项；取消跨区时恢复为 zoom"""
+        key = "org.gnome.desktop.background"
+        if spanned:
+            os.system(f"gsettings set {key} picture-options spanned")
+        elif os.popen(f"gsettings get {key} picture-options").read().strip() == "'spanned'":
+            os.system(f"gsettings set {key} picture-options zoom")
+
+    def _download_photo(self, photo, width, height):
+        """获取指定尺寸的照片，返回本地路径；缓存命中时不访问网络
+
+        安装了 Pillow 时每张照片只下载一个母版，各种尺寸在本地缩放裁剪生成，
+        切换画质或屏幕时不需要重新下载；否则直接下载裁剪好的尺寸。
+        """
+        key = ImageCache.make_key(photo["id"], width, height)
+        cached_path = self.image_cache.get(key)
+        if cached_path:
+            print(f"命中图片缓存: {key}")
+            return cached_path
+
+        filepath = self.image_cache.path_for(key)
+        if image_processing.is_available() and photo.get("width") and photo.get("height"):
+            master_path = self._get_master(photo, (width, height))
+            image_processing.make_variant(master_path, filepath, (width, height))
+            print(f"从母版生成图片: {key}")
+            self.image_cache.put(key, self._protected_paths() | {master_path})
+            return filepath
 
-        except Exception as e:
-            print(f"清理旧壁纸文件时出错: {e}")
+        # 构建下载URL
+        image_url = photo["urls"]["raw"]
+        download_url = f"{image_url}&w={width}&h={height}&fit=crop&crop=entropy"
+
+        size = self.http.download_to_file(download_url, filepath)
+        self.bandwidth.record_image(size, width * height)
+        print(f"图片下载完成: {size / 1024 / 1024:.1f} MB")
+        self.image_cache.put(key, self._protected_paths())
+        return filepath
+
+    def _get_master(self, photo, target):
+        """获取照片的母版，缓存的母版不够大时重新下载
+
+        母版按所有屏幕的最高画质尺寸下载（不超过原图），
+        之后任何画质和屏幕的尺寸都可以在本地生成。
+        """
+        photo_size = (photo["width"], photo["height"])
+        key = ImageCache.make_master_key(photo["id"])
+        master_path = self.image_cache.get(key)
+        if master_path and image_processing.covers(
+            image_processing.image_size(master_path), target, photo_size
+        ):
+            return master_path
+
+        targets = [target] + [
+            build_resolution_levels(*screen["physical"])["full"]
+            for screen in self.screen_info.screens()
+        ]
+        master_width, master_height = image_processing.master_size(photo_size, targets)
+
+        # 网速不足以在时间预算内下载最高画质的母版时，只下载当前需要的尺寸
+        if self.settings.get_setting("adaptive_quality", True):
+            estimate = self.bandwidth.estimate_seconds(master_width * master_height)
+            if estimate is not None and estimate > self.settings.get_setting(
+                "download_time_budget", 15
+            ):
+                master_width, master_height = image_processing.master_size(
+                    photo_size, [target]
+                )
+
+        image_url = photo["urls"]["raw"]
+        download_url = f"{image_url}&w={master_width}&h={master_height}&fit=max"
+
+        master_path = self.image_cache.path_for(key)
+        size = self.http.download_to_file(download_url, master_path)
+        self.bandwidth.record_image(size, master_width * master_height)
+        print(
+            f"母版下载完成: {master_width} x {master_height}, "
+            f"{size / 1024 / 1024:.1f} MB"
+        )
+        self.image_cache.put(key, self._protected_paths())
+        return master_path
+
+    def _protected_paths(self):
+        """不能被缓存淘汰的图片：当前壁纸和预取队列中的图片"""
+        protected = self.prefetch_queue.queued_paths()
+        protected.add(self.current_wallpaper)
+        protected.update(self._screen_wallpapers)
+        return protected
 
     def manual_change_wallpaper(self):
         self.change_wallpaper()